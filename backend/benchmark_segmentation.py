@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the word-timestamp segmentation engine on large synthetic transcripts
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+from utils.segmenter import WordColumns, segment, UTTERANCE_SPLIT_MIN_CHARS, WORD_CUE_MAX_MS
+
+VOCABULARY = ["the", "a", "meeting", "we", "should", "probably", "review", "numbers", "today", "okay"]
+
+def make_utterances(word_count: int, seed: int = 7) -> list:
+    """Synthetic utterances: two speakers, sentences of 5-20 words, utterances of 1-6 sentences"""
+    rng = random.Random(seed)
+    utterances = []
+    time_ms = 0
+    made = 0
+    speaker = "A"
+    while made < word_count:
+        words = []
+        for _ in range(rng.randint(1, 6)):
+            sentence_length = rng.randint(5, 20)
+            for position in range(sentence_length):
+                text = rng.choice(VOCABULARY)
+                if position == sentence_length - 1:
+                    text += rng.choice(".?!")
+                start = time_ms + rng.randint(20, 120)
+                end = start + rng.randint(120, 500)
+                words.append(SimpleNamespace(text=text, start=start, end=end, speaker=speaker))
+                time_ms = end
+        utterances.append(SimpleNamespace(
+            text=" ".join(word.text for word in words),
+            start=words[0].start,
+            end=words[-1].end,
+            speaker=speaker,
+            words=words,
+        ))
+        made += len(words)
+        speaker = "B" if speaker == "A" else "A"
+    return utterances
+
+def best_of(runs: int, func):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def benchmark(word_count: int, runs: int = 3):
+    utterances = make_utterances(word_count)
+    words = [word for utterance in utterances for word in utterance.words]
+
+    load_time, columns = best_of(runs, lambda: WordColumns.from_utterances(utterances))
+    segment_time, cues = best_of(runs, lambda: segment(columns, min_split_chars=UTTERANCE_SPLIT_MIN_CHARS))
+    word_columns = WordColumns.from_words(words)
+    words_time, word_cues = best_of(runs, lambda: segment(word_columns, max_cue_ms=WORD_CUE_MAX_MS))
+
+    print(f"{len(words):>9,} words | columns {load_time * 1000:8.1f} ms"
+          f" | utterance mode {segment_time * 1000:8.1f} ms ({len(cues):,} cues)"
+          f" | word mode {words_time * 1000:8.1f} ms ({len(word_cues):,} cues)"
+          f" | {len(words) / segment_time / 1e6:5.2f} M words/s")
+    return segment_time
+
+def main():
+    print("=== Segmentation benchmark ===")
+    timings = {count: benchmark(count) for count in (100_000, 200_000, 400_000, 800_000)}
+    # Linear time means doubling the input roughly doubles the time
+    print(f"800k / 100k time ratio: {timings[800_000] / timings[100_000]:.1f} (8.0 is linear)")
+
+if __name__ == "__main__":
+    main()
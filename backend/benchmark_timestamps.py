@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Compare per-cue and batched subtitle timestamp formatting on 50k cues
+"""
+
+import random
+import time
+
+from models import SubtitleSegment
+from utils.format_converter import FormatConverter
+
+CUES = 50_000
+
+def legacy_srt_time(seconds: float) -> str:
+    """The per-cue formatter exports used before batching (truncates milliseconds)"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    milliseconds = int((seconds % 1) * 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+def make_times(count: int, seed: int = 7) -> list:
+    """Cue boundaries of a long recording, on whole milliseconds like AssemblyAI word times"""
+    rng = random.Random(seed)
+    times = []
+    ms = 0
+    for _ in range(count):
+        ms += rng.randint(800, 6000)
+        times.append(ms / 1000.0)
+    return times
+
+def best_of(runs: int, func):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    print(f"=== Timestamp formatting benchmark ({CUES:,} cues, {2 * CUES:,} timestamps) ===")
+    times = make_times(2 * CUES)
+
+    legacy_time, legacy = best_of(5, lambda: [legacy_srt_time(t) for t in times])
+    single_time, single = best_of(5, lambda: [FormatConverter._seconds_to_srt_time(t) for t in times])
+    batch_time, batched = best_of(5, lambda: FormatConverter.format_timestamps(times))
+
+    assert single == batched
+    drifted = sum(1 for old, new in zip(legacy, batched) if old != new)
+
+    for name, elapsed in (("per-cue (legacy)", legacy_time), ("per-cue", single_time), ("batched", batch_time)):
+        print(f"{name:>17}: {elapsed * 1000:7.1f} ms  {len(times) / elapsed / 1e6:5.2f} M timestamps/s")
+    print(f"Batched speedup over legacy: {legacy_time / batch_time:.1f}x")
+    print(f"Timestamps the legacy formatter got 1 ms wrong: {drifted:,} of {len(times):,}")
+
+    segments = [
+        SubtitleSegment(start=start, end=end, text="Some typical subtitle cue text.", speaker="A")
+        for start, end in zip(times[::2], times[1::2])
+    ]
+    render_time, chunks = best_of(3, lambda: list(FormatConverter.render_srt(segments)))
+    size = sum(len(chunk) for chunk in chunks)
+    print(f"Full SRT render: {render_time * 1000:.1f} ms for {size / 1e6:.1f} MB in {len(chunks)} chunks")
+
+if __name__ == "__main__":
+    main()
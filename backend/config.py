@@ -1,4 +1,5 @@
 import os
+import secrets
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,11 +7,49 @@ load_dotenv()
 class Settings:
     # AssemblyAI Configuration
     ASSEMBLYAI_API_KEY: str = os.getenv("ASSEMBLYAI_API_KEY", "")
+    ASSEMBLYAI_BASE_URL: str = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.assemblyai.com")
+    # Pooled HTTP connections shared by all AssemblyAI calls
+    ASSEMBLYAI_MAX_CONNECTIONS: int = int(os.getenv("ASSEMBLYAI_MAX_CONNECTIONS", "32"))
+    ASSEMBLYAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("ASSEMBLYAI_MAX_KEEPALIVE_CONNECTIONS", "16"))
+    ASSEMBLYAI_KEEPALIVE_EXPIRY: float = float(os.getenv("ASSEMBLYAI_KEEPALIVE_EXPIRY", "30"))
+    ASSEMBLYAI_TIMEOUT: float = float(os.getenv("ASSEMBLYAI_TIMEOUT", "30"))  # Connect/read timeout
+    ASSEMBLYAI_POOL_TIMEOUT: float = float(os.getenv("ASSEMBLYAI_POOL_TIMEOUT", "60"))  # Wait for a free connection
     
     # File Upload Configuration
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "./temp_uploads")
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "1000000000"))  # 1000MB default
     ALLOWED_EXTENSIONS: set = {".mp3", ".mp4", ".mkv", ".wav", ".m4a"}
+    # Transcode the audio track of these uploads with ffmpeg before sending them upstream
+    AUDIO_EXTRACTION_ENABLED: bool = os.getenv("AUDIO_EXTRACTION_ENABLED", "true").lower() == "true"
+    AUDIO_EXTRACTION_EXTENSIONS: set = {
+        ext.strip().lower() for ext in os.getenv("AUDIO_EXTRACTION_EXTENSIONS", ".mp4,.mkv").split(",") if ext.strip()
+    }
+    AUDIO_EXTRACTION_CODEC: str = os.getenv("AUDIO_EXTRACTION_CODEC", "opus")  # opus or flac
+    AUDIO_EXTRACTION_BITRATE: str = os.getenv("AUDIO_EXTRACTION_BITRATE", "32k")  # Opus only
+    AUDIO_EXTRACTION_WORKERS: int = int(os.getenv("AUDIO_EXTRACTION_WORKERS", "2"))
+    AUDIO_EXTRACTION_TIMEOUT: float = float(os.getenv("AUDIO_EXTRACTION_TIMEOUT", "600"))
+    FFMPEG_PATH: str = os.getenv("FFMPEG_PATH", "ffmpeg")
+    FFPROBE_PATH: str = os.getenv("FFPROBE_PATH", "ffprobe")
+    # Transcribe long recordings as overlapping chunks in parallel (needs ffmpeg and ffprobe)
+    CHUNKED_TRANSCRIPTION_ENABLED: bool = os.getenv("CHUNKED_TRANSCRIPTION_ENABLED", "false").lower() == "true"
+    CHUNK_MIN_DURATION: float = float(os.getenv("CHUNK_MIN_DURATION", "1800"))  # Only split media longer than this
+    CHUNK_DURATION: float = float(os.getenv("CHUNK_DURATION", "600"))  # Target chunk length in seconds
+    CHUNK_OVERLAP: float = float(os.getenv("CHUNK_OVERLAP", "5"))  # Seconds shared by neighbouring chunks
+    CHUNK_SILENCE_SEARCH_WINDOW: float = float(os.getenv("CHUNK_SILENCE_SEARCH_WINDOW", "60"))  # Look this far for a pause
+    CHUNK_SILENCE_NOISE: str = os.getenv("CHUNK_SILENCE_NOISE", "-35dB")
+    CHUNK_SILENCE_MIN_DURATION: float = float(os.getenv("CHUNK_SILENCE_MIN_DURATION", "0.5"))
+    # Reuse transcripts of identical uploads for this many seconds (0 disables)
+    DEDUP_TTL: int = int(os.getenv("DEDUP_TTL", "86400"))  # 24 hours
+    # Keep a local copy of pass-through uploads streamed to /upload/stream
+    STREAM_UPLOAD_TEE_TO_DISK: bool = os.getenv("STREAM_UPLOAD_TEE_TO_DISK", "false").lower() == "true"
+    # Pass-through uploads run at the client's pace, so they get their own limit apart from SUBMIT_CONCURRENCY
+    STREAM_UPLOAD_CONCURRENCY: int = int(os.getenv("STREAM_UPLOAD_CONCURRENCY", "8"))
+    # Batch uploads: files per request (at most ADMISSION_MAX_QUEUED_PER_CLIENT fit), and how many of them are saved at once
+    UPLOAD_BATCH_MAX_FILES: int = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "20"))
+    UPLOAD_BATCH_CONCURRENCY: int = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", "4"))
+    # Resumable upload sessions: idle seconds before an unfinished one is discarded, suggested bytes per part
+    UPLOAD_SESSION_TTL: int = int(os.getenv("UPLOAD_SESSION_TTL", "3600"))
+    UPLOAD_PART_SIZE: int = int(os.getenv("UPLOAD_PART_SIZE", "8388608"))  # 8MB
     
     # CORS Configuration
     CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:5174,http://localhost:3000").split(",")
@@ -18,10 +57,64 @@ class Settings:
     # API Configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
+
+    # Webhook Configuration (leave WEBHOOK_BASE_URL empty to poll AssemblyAI instead)
+    WEBHOOK_BASE_URL: str = os.getenv("WEBHOOK_BASE_URL", "")
+    WEBHOOK_AUTH_HEADER_NAME: str = os.getenv("WEBHOOK_AUTH_HEADER_NAME", "X-ScribeEasy-Webhook-Token")
+    # Set explicitly when running several workers, otherwise each one generates its own token
+    WEBHOOK_AUTH_HEADER_VALUE: str = os.getenv("WEBHOOK_AUTH_HEADER_VALUE", "") or secrets.token_urlsafe(32)
+    WEBHOOK_FALLBACK_POLL_INTERVAL: int = int(os.getenv("WEBHOOK_FALLBACK_POLL_INTERVAL", "300"))  # 5 minutes
     
     # Cleanup Configuration
-    CLEANUP_INTERVAL: int = int(os.getenv("CLEANUP_INTERVAL", "3600"))  # 1 hour
     FILE_RETENTION: int = int(os.getenv("FILE_RETENTION", "1800"))  # 30 minutes
+    DOWNLOAD_GRACE_PERIOD: int = int(os.getenv("DOWNLOAD_GRACE_PERIOD", "300"))  # 5 minutes after completion
+    JOB_MAX_LIFETIME: int = int(os.getenv("JOB_MAX_LIFETIME", "3600"))  # 1 hour
+
+    # Admission Queue Configuration (per worker process)
+    ADMISSION_MAX_CONCURRENT: int = int(os.getenv("ADMISSION_MAX_CONCURRENT", "16"))  # Jobs submitted and unfinished
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "200"))  # Jobs waiting to be submitted
+    ADMISSION_MAX_QUEUED_PER_CLIENT: int = int(os.getenv("ADMISSION_MAX_QUEUED_PER_CLIENT", "20"))
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "30"))  # Seconds, sent with 429 responses
+    # Header carrying a client's API key; clients are told apart by IP when unset or absent
+    ADMISSION_CLIENT_HEADER: str = os.getenv("ADMISSION_CLIENT_HEADER", "")
+    # How long a worker's claim on submitting a job lasts; keeps workers from submitting it twice
+    ADMISSION_SUBMIT_CLAIM: float = float(os.getenv("ADMISSION_SUBMIT_CLAIM", "3600"))
+
+    # Job Poller Configuration
+    POLL_MIN_INTERVAL: float = float(os.getenv("POLL_MIN_INTERVAL", "3"))
+    POLL_MAX_INTERVAL: float = float(os.getenv("POLL_MAX_INTERVAL", "60"))
+    # Independent limits for concurrent AssemblyAI status calls and media submissions
+    POLL_CONCURRENCY: int = int(os.getenv("POLL_CONCURRENCY", "8"))
+    SUBMIT_CONCURRENCY: int = int(os.getenv("SUBMIT_CONCURRENCY", "4"))
+    POLL_MAX_FAILURES: int = int(os.getenv("POLL_MAX_FAILURES", "5"))
+    POLL_BASE_TURNAROUND: float = float(os.getenv("POLL_BASE_TURNAROUND", "15"))
+    POLL_TURNAROUND_RATIO: float = float(os.getenv("POLL_TURNAROUND_RATIO", "0.25"))
+    POLL_ASSUMED_BYTES_PER_SECOND: int = int(os.getenv("POLL_ASSUMED_BYTES_PER_SECOND", "16000"))  # ~128 kbps
+
+    # Bulk Status Configuration (GET/POST /status)
+    STATUS_BULK_MAX_IDS: int = int(os.getenv("STATUS_BULK_MAX_IDS", "500"))
+    STATUS_STALE_AFTER: float = float(os.getenv("STATUS_STALE_AFTER", "10"))  # Seconds past a job's scheduled poll
+    STATUS_REFRESH_TIMEOUT: float = float(os.getenv("STATUS_REFRESH_TIMEOUT", "5"))  # Longest wait for stale jobs
+
+    # Event Stream Configuration
+    EVENT_HEARTBEAT_INTERVAL: float = float(os.getenv("EVENT_HEARTBEAT_INTERVAL", "15"))
+
+    # Job Store Configuration ("memory" for a single worker, "sqlite" to share jobs between workers)
+    JOB_STORE: str = os.getenv("JOB_STORE", "memory")
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "./jobs.sqlite3")
+    JOB_STORE_BUSY_TIMEOUT: float = float(os.getenv("JOB_STORE_BUSY_TIMEOUT", "5"))
+    POLL_RESCAN_INTERVAL: float = float(os.getenv("POLL_RESCAN_INTERVAL", "30"))
+
+    # Transcript Archive Configuration (SQLite FTS5 search across all completed jobs)
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+    ARCHIVE_PATH: str = os.getenv("ARCHIVE_PATH", "./archive.sqlite3")
+    ARCHIVE_RANK_TIMEOUT: float = float(os.getenv("ARCHIVE_RANK_TIMEOUT", "0.25"))  # Seconds before falling back to newest-first
+
+    # Cache Configuration
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv("RESULT_CACHE_MAX_BYTES", "268435456"))  # 256MB
+    EXPORT_CACHE_MAX_BYTES: int = int(os.getenv("EXPORT_CACHE_MAX_BYTES", "134217728"))  # 128MB
+    EXPORT_COMPRESSION_MIN_BYTES: int = int(os.getenv("EXPORT_COMPRESSION_MIN_BYTES", "1024"))
+    EXPORT_STREAM_MIN_BYTES: int = int(os.getenv("EXPORT_STREAM_MIN_BYTES", "1048576"))  # 1MB; larger exports are streamed, not cached
 
 settings = Settings()
 
@@ -1,17 +1,31 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse, Response
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 import asyncio
+import hmac
 import re
+import time
 from pathlib import Path
+from typing import List, Optional
 
 from config import settings
 from models import (
     UploadResponse, TranscriptionStatusResponse, TranscriptionResult, 
-    DownloadResponse, ErrorResponse, OutputFormat, TranscriptionStatus
+    DownloadResponse, ErrorResponse, OutputFormat, TranscriptionStatus, SegmentPage,
+    SearchResults, ArchiveSearchResults, BatchUploadItem, BatchUploadResponse,
+    JobStatusRecord, BulkStatusRequest, BulkStatusResponse, UploadSessionRequest, UploadSessionStatus
 )
 from services.file_service import file_service
 from services.transcription_service import transcription_service
+from services.assemblyai_client import assemblyai_client
+from services.admission_queue import admission_queue
+from services.audio_service import audio_service
+from services.export_service import export_service
+from services.archive_service import transcript_archive
+from services.event_service import job_event_broker
+from services.job_poller import job_poller
+from utils.expiry_scheduler import expiry_scheduler
+from utils.multipart_stream import MultipartFileReader
 from utils.format_converter import format_converter
 
 app = FastAPI(
@@ -29,23 +43,117 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Background task for cleanup
-async def cleanup_files():
-    """Background task to clean up old files"""
-    while True:
-        await file_service.cleanup_old_files()
-        await asyncio.sleep(settings.CLEANUP_INTERVAL)
+# Expiry of uploaded files and job records
+def expire_file(file_path: str):
+    """Delete an uploaded file once its retention period is over"""
+    file_service.delete_file(file_path)
+
+def expire_job(job_id: str):
+    """Drop a job record together with its file and cached exports"""
+    job_info = transcription_service.get_job_info(job_id)
+    if job_info and job_info.get("file_path"):
+        expiry_scheduler.cancel(("file", job_info["file_path"]))
+        file_service.delete_file(job_info["file_path"])
+    admission_queue.discard(job_id)
+    transcription_service.cleanup_job(job_id)
+    export_service.invalidate(job_id)
+
+def schedule_upload_expiry(job_id: str, file_path: Optional[str]):
+    """Set the outer deadlines for a new upload and its job
+
+    Submission still reads the file, so its retention only starts once the
+    job has left the admission queue (see schedule_file_expiry_on_submit).
+    """
+    now = time.time()
+    if file_path and not transcription_service.needs_submission(job_id):
+        schedule_file_expiry(file_path, now + settings.FILE_RETENTION)
+    expiry_scheduler.schedule(("job", job_id), now + settings.JOB_MAX_LIFETIME,
+                              lambda: expire_job(job_id))
+    transcription_service.set_job_expiry(job_id, now + settings.JOB_MAX_LIFETIME)
+
+def schedule_file_expiry(file_path: str, deadline: float):
+    """Delete an uploaded file at deadline"""
+    expiry_scheduler.schedule(("file", file_path), deadline, lambda: expire_file(file_path))
+
+def schedule_file_expiry_on_submit(job_id: str, result: TranscriptionResult):
+    """Start the retention of a job's upload once it has been submitted or has failed"""
+    job_info = transcription_service.get_job_info(job_id)
+    if job_info is None or not job_info.get("file_path") or transcription_service.needs_submission(job_id):
+        return
+    file_path = job_info["file_path"]
+    # Later status changes find the timer already set, or the file already gone
+    if expiry_scheduler.deadline(("file", file_path)) is None and Path(file_path).exists():
+        schedule_file_expiry(file_path, time.time() + settings.FILE_RETENTION)
+
+def schedule_session_expiry(upload_id: str, expires_at: float):
+    """(Re)set the idle timeout of a resumable upload session"""
+    expiry_scheduler.schedule(("upload", upload_id), expires_at,
+                              lambda: expire_upload_session(upload_id))
+
+def expire_upload_session(upload_id: str):
+    """Abort an idle upload session, or wait for the deadline another request extended it to"""
+    expires_at = file_service.expire_upload_session(upload_id)
+    if expires_at is not None:
+        schedule_session_expiry(upload_id, expires_at)
+
+def schedule_expiry_on_finish(job_id: str, result: TranscriptionResult):
+    """Expire finished jobs after a grace period that leaves time for downloads"""
+    if result.status not in (TranscriptionStatus.COMPLETED, TranscriptionStatus.ERROR):
+        return
+    deadline = time.time() + settings.DOWNLOAD_GRACE_PERIOD
+    if deadline < (expiry_scheduler.deadline(("job", job_id)) or float("inf")):
+        expiry_scheduler.schedule(("job", job_id), deadline, lambda: expire_job(job_id))
+        transcription_service.set_job_expiry(job_id, deadline)
+
+transcription_service.status_listeners.append(schedule_expiry_on_finish)
+transcription_service.status_listeners.append(schedule_file_expiry_on_submit)
 
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks"""
-    asyncio.create_task(cleanup_files())
+    # Files left over from a previous run expire on their original schedule
+    for file_path, modified_at in file_service.list_upload_files():
+        schedule_file_expiry(file_path, modified_at + settings.FILE_RETENTION)
+    # Jobs kept in a persistent store keep their recorded deadlines
+    for job_id, expires_at in transcription_service.jobs.expiring_jobs():
+        expiry_scheduler.schedule(("job", job_id), expires_at,
+                                  lambda job_id=job_id: expire_job(job_id))
+    # So do resumable upload sessions, which any worker may have started
+    for upload_id, expires_at in file_service.store.expiring_upload_sessions():
+        schedule_session_expiry(upload_id, expires_at)
+    # Jobs that were waiting for admission are queued again; their files are kept until submission
+    for job_id in admission_queue.restore():
+        job_info = transcription_service.get_job_info(job_id)
+        if job_info and job_info.get("file_path"):
+            expiry_scheduler.cancel(("file", job_info["file_path"]))
+    expiry_scheduler.start()
+    job_poller.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled upstream connections"""
+    await assemblyai_client.close()
 
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "ScribeEasy API is running", "version": "1.0.0"}
 
+@app.get("/stats")
+async def get_stats():
+    """Queue depths, wait times and cache usage of background components"""
+    return {
+        "assemblyai": assemblyai_client.stats(),
+        "admission_queue": admission_queue.stats(),
+        "audio_extraction": audio_service.stats(),
+        "job_poller": job_poller.stats(),
+        "expiry_scheduler": expiry_scheduler.stats(),
+        "result_cache": transcription_service.result_cache.stats(),
+        "export_cache": export_service.cache.stats(),
+        "archive": transcript_archive.stats(),
+        "upload_sessions": len(file_service.store.expiring_upload_sessions()),
+    }
+
 @app.get("/test-download")
 async def test_download():
     """Test endpoint for download functionality"""
@@ -64,30 +172,29 @@ async def test_download():
     )
 
 @app.post("/upload", response_model=UploadResponse)
-async def upload_file(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
-):
-    """Upload file and start transcription"""
+async def upload_file(request: Request, file: UploadFile = File(...)):
+    """Upload file and queue it for transcription"""
+    client = admission_queue.client_key(request)
     try:
         print(f"DEBUG: Upload started for file: {file.filename}, size: {file.size if hasattr(file, 'size') else 'unknown'}")
 
-        # Save uploaded file
-        print("DEBUG: Saving uploaded file...")
-        file_path = await file_service.save_upload_file(file)
-        print(f"DEBUG: File saved to: {file_path}")
+        with admission_queue.reservation(client):
+            # Save uploaded file
+            print("DEBUG: Saving uploaded file...")
+            file_path, content_hash = await file_service.save_upload_file(file)
+            print(f"DEBUG: File saved to: {file_path}")
 
-        # Start transcription
-        print("DEBUG: Starting transcription...")
-        job_id = await transcription_service.start_transcription(file_path, file.filename)
-        print(f"DEBUG: Transcription started with job_id: {job_id}")
+            # Queue transcription
+            job_id = await transcription_service.create_job(file_path, file.filename, content_hash=content_hash)
+            admission_queue.enqueue(job_id, client)
+            print(f"DEBUG: Transcription queued with job_id: {job_id}")
 
-        # Schedule file cleanup after processing
-        background_tasks.add_task(cleanup_after_processing, job_id, file_path)
+        # Schedule file and job cleanup
+        schedule_upload_expiry(job_id, file_path)
 
         return UploadResponse(
             job_id=job_id,
-            message="File uploaded successfully. Transcription started.",
+            message="File uploaded successfully. Transcription queued.",
             filename=file.filename
         )
 
@@ -99,75 +206,366 @@ async def upload_file(
         print(f"ERROR: Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@app.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_files_batch(request: Request, files: List[UploadFile] = File(...)):
+    """Upload many files at once and queue each for transcription
+
+    Files are saved concurrently, UPLOAD_BATCH_CONCURRENCY at a time, and a
+    file that fails does not fail the others. A batch that does not fit in
+    the client's share of the admission queue is rejected as a whole.
+    """
+    if len(files) > settings.UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum per batch: {settings.UPLOAD_BATCH_MAX_FILES}"
+        )
+
+    client = admission_queue.client_key(request)
+    admission_queue.check_room(client, len(files))
+    saves = asyncio.Semaphore(settings.UPLOAD_BATCH_CONCURRENCY)
+
+    async def upload_one(file: UploadFile) -> BatchUploadItem:
+        try:
+            async with saves:
+                with admission_queue.reservation(client):
+                    file_path, content_hash = await file_service.save_upload_file(file)
+                    job_id = await transcription_service.create_job(file_path, file.filename, content_hash=content_hash)
+                    # Submission is bounded by the admission queue and the AssemblyAI submissions bulkhead
+                    admission_queue.enqueue(job_id, client)
+
+            schedule_upload_expiry(job_id, file_path)
+            return BatchUploadItem(filename=file.filename, job_id=job_id)
+        except HTTPException as e:
+            return BatchUploadItem(filename=file.filename, error=str(e.detail), status_code=e.status_code)
+        except Exception as e:
+            print(f"ERROR: Batch upload of {file.filename} failed: {str(e)}")
+            return BatchUploadItem(filename=file.filename, error=f"Upload failed: {str(e)}", status_code=500)
+
+    print(f"DEBUG: Batch upload started with {len(files)} files")
+    items = await asyncio.gather(*(upload_one(file) for file in files))
+    accepted = sum(1 for item in items if item.job_id)
+    print(f"DEBUG: Batch upload queued {accepted} of {len(items)} files")
+
+    return BatchUploadResponse(accepted=accepted, failed=len(items) - accepted, files=items)
+
+def upload_session_status(session: dict) -> UploadSessionStatus:
+    """Progress of a resumable upload as returned by the session endpoints"""
+    progress = file_service.upload_progress(session)
+    return UploadSessionStatus(
+        upload_id=session["upload_id"],
+        filename=session["filename"],
+        size=session["size"],
+        part_size=settings.UPLOAD_PART_SIZE,
+        committed_offset=progress["committed_offset"],
+        received_bytes=progress["received_bytes"],
+        missing_ranges=[list(missing) for missing in progress["missing_ranges"]],
+        expires_at=session["expires_at"],
+    )
+
+@app.post("/upload/sessions", response_model=UploadSessionStatus)
+async def create_upload_session(body: UploadSessionRequest):
+    """Start a resumable upload; send its bytes with PUT, then complete it"""
+    session = await file_service.create_upload_session(body.filename, body.size)
+    schedule_session_expiry(session["upload_id"], session["expires_at"])
+    print(f"DEBUG: Upload session {session['upload_id']} started for {body.filename} ({body.size} bytes)")
+    return upload_session_status(session)
+
+@app.put("/upload/sessions/{upload_id}", response_model=UploadSessionStatus)
+async def upload_session_range(upload_id: str, request: Request):
+    """Write one byte range of a resumable upload, given by its Content-Range header"""
+    session = file_service.get_upload_session(upload_id)
+    start, end = file_service.parse_content_range(request.headers.get("content-range"), session["size"])
+    try:
+        session = await file_service.write_upload_range(upload_id, start, end, request.stream())
+    finally:
+        # Ranges recorded before a failure extended the deadline too
+        current = file_service.store.get_upload_session(upload_id)
+        if current is not None:
+            schedule_session_expiry(upload_id, current["expires_at"])
+    return upload_session_status(session)
+
+@app.get("/upload/sessions/{upload_id}", response_model=UploadSessionStatus)
+async def get_upload_session(upload_id: str):
+    """Committed offset and missing ranges of a resumable upload"""
+    return upload_session_status(file_service.get_upload_session(upload_id))
+
+@app.post("/upload/sessions/{upload_id}/complete", response_model=UploadResponse)
+async def complete_upload_session(upload_id: str, request: Request):
+    """Finish a fully received upload and queue it for transcription"""
+    client = admission_queue.client_key(request)
+    session = file_service.get_upload_session(upload_id)
+    file_path = None
+    job_id = None
+    try:
+        with admission_queue.reservation(client):
+            file_path, content_hash = await file_service.finish_upload_session(upload_id)
+            expiry_scheduler.cancel(("upload", upload_id))
+
+            job_id = await transcription_service.create_job(file_path, session["filename"], content_hash=content_hash)
+            admission_queue.enqueue(job_id, client)
+            print(f"DEBUG: Upload session {upload_id} completed, transcription queued with job_id: {job_id}")
+
+        schedule_upload_expiry(job_id, file_path)
+
+        return UploadResponse(
+            job_id=job_id,
+            message="File uploaded successfully. Transcription queued.",
+            filename=session["filename"]
+        )
+
+    except Exception as e:
+        # Once taken, the session no longer expires, so its file would never be deleted
+        if file_path and job_id is None:
+            file_service.delete_file(file_path)
+        if isinstance(e, HTTPException):
+            raise
+        print(f"ERROR: Completing upload session {upload_id} failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+@app.delete("/upload/sessions/{upload_id}")
+async def abort_upload_session(upload_id: str):
+    """Abandon a resumable upload and delete what was received"""
+    if not await file_service.abort_upload_session(upload_id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    expiry_scheduler.cancel(("upload", upload_id))
+    return {"aborted": True}
+
+@app.post("/upload/stream", response_model=UploadResponse)
+async def upload_file_stream(request: Request):
+    """Upload file while streaming it straight through to AssemblyAI, then queue its transcription"""
+    client = admission_queue.client_key(request)
+    reader = MultipartFileReader(request.stream(), request.headers.get("content-type", ""))
+    filename = await reader.read_filename()
+    file_service.validate_filename(filename)
+
+    tee_path = file_service.new_upload_path(filename) if settings.STREAM_UPLOAD_TEE_TO_DISK else None
+    file_path = str(tee_path) if tee_path else None
+    stats = {"size": 0}
+
+    try:
+        with admission_queue.reservation(client):
+            # Chunks go upstream as they arrive; the upload URL comes back right after the last byte
+            print(f"DEBUG: Streaming upload started for file: {filename}")
+            audio_url = await assemblyai_client.upload_stream(file_service.tee_stream(reader.chunks(), stats, tee_path))
+            print(f"DEBUG: Streamed {stats['size']} bytes to AssemblyAI")
+
+            job_id = await transcription_service.create_job(
+                file_path, filename, audio_url=audio_url, file_size=stats["size"],
+                content_hash=stats.get("sha256")
+            )
+            admission_queue.enqueue(job_id, client)
+            print(f"DEBUG: Transcription queued with job_id: {job_id}")
+
+        schedule_upload_expiry(job_id, file_path)
+
+        return UploadResponse(
+            job_id=job_id,
+            message="File uploaded successfully. Transcription queued.",
+            filename=filename
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        if file_path:
+            file_service.delete_file(file_path)
+        print(f"ERROR: Streaming upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+async def bulk_status(job_ids: List[str]) -> BulkStatusResponse:
+    """Status records for many jobs from local state, refreshing stale ones in one batch"""
+    job_ids = list(dict.fromkeys(job_id.strip() for job_id in job_ids if job_id.strip()))
+    if len(job_ids) > settings.STATUS_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many job ids. Maximum per request: {settings.STATUS_BULK_MAX_IDS}"
+        )
+
+    job_infos = {job_id: transcription_service.get_job_info(job_id) for job_id in job_ids}
+    now = time.time()
+    stale = [job_id for job_id, job_info in job_infos.items() if job_info and job_poller.is_stale(job_info, now)]
+    refreshed = 0
+    if stale:
+        refreshed = await job_poller.refresh_now(stale, settings.STATUS_REFRESH_TIMEOUT)
+        for job_id in stale:
+            job_infos[job_id] = transcription_service.get_job_info(job_id)
+
+    jobs = []
+    missing = []
+    for job_id, job_info in job_infos.items():
+        if job_info is None:
+            missing.append(job_id)
+            continue
+        status = job_info["status"]
+        jobs.append(JobStatusRecord(
+            job_id=job_id,
+            status=status,
+            filename=job_info.get("filename"),
+            error=job_info.get("error"),
+            queue_position=admission_queue.reported_position(job_id) if status == TranscriptionStatus.QUEUED else None,
+            checked_at=job_info.get("checked_at"),
+            completed_at=job_info.get("completed_at"),
+        ))
+    return BulkStatusResponse(jobs=jobs, missing=missing, refreshed=refreshed)
+
+@app.get("/status", response_model=BulkStatusResponse)
+async def get_bulk_status(ids: str = Query(..., description="Comma-separated job ids")):
+    """Get the status of many jobs at once"""
+    return await bulk_status(ids.split(","))
+
+@app.post("/status", response_model=BulkStatusResponse)
+async def post_bulk_status(body: BulkStatusRequest):
+    """Get the status of many jobs at once, for id lists too long for a query string"""
+    return await bulk_status(body.ids)
+
 @app.get("/status/{job_id}", response_model=TranscriptionResult)
 async def get_transcription_status(job_id: str):
     """Get transcription status"""
     try:
         result = await transcription_service.get_transcription_status(job_id)
-        return result
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
+    if result.status == TranscriptionStatus.QUEUED:
+        result.queue_position = admission_queue.reported_position(job_id)
+    elif result.status == TranscriptionStatus.COMPLETED:
+        # Segment models are only built here, for the response
+        segments = await transcription_service.get_segments(job_id)
+        result = result.model_copy(update={"segments": segments.to_segments() if segments else []})
+    return result
+
+@app.get("/events/{job_id}")
+async def stream_job_events(job_id: str, request: Request):
+    """Stream job status transitions and the final result summary as Server-Sent Events"""
+    if transcription_service.get_job_info(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return StreamingResponse(
+        job_event_broker.stream(job_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+@app.post("/webhooks/assemblyai")
+async def assemblyai_webhook(request: Request, background_tasks: BackgroundTasks):
+    """Receive transcript completion callbacks from AssemblyAI"""
+    if not transcription_service.webhook_url:
+        raise HTTPException(status_code=404, detail="Webhooks are not enabled")
+
+    provided_token = request.headers.get(settings.WEBHOOK_AUTH_HEADER_NAME, "")
+    if not hmac.compare_digest(provided_token, settings.WEBHOOK_AUTH_HEADER_VALUE):
+        raise HTTPException(status_code=401, detail="Invalid webhook credentials")
 
-@app.get("/download/{job_id}/{format}")
-async def download_transcription(job_id: str, format: OutputFormat):
-    """Download transcription in specified format"""
     try:
-        # Check if transcription is completed first
-        result = await transcription_service.get_transcription_status(job_id)
+        payload = await request.json()
+        transcript_id = payload["transcript_id"]
+        status = payload.get("status", "")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
 
-        if result.status != TranscriptionStatus.COMPLETED:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Transcription not completed. Status: {result.status}"
-            )
+    # Acknowledge immediately; the transcript is fetched once after the response
+    background_tasks.add_task(transcription_service.handle_webhook, transcript_id, status)
+    return {"received": True}
 
-        # Use AssemblyAI's built-in subtitle export functionality
-        try:
-            content = await transcription_service.get_subtitle_export(job_id, format.value)
-            print(f"DEBUG: Successfully got content from transcription service")
-        except Exception as e:
-            print(f"ERROR: Failed to get content from transcription service: {e}")
-            raise
+def download_basename(job_id: str) -> str:
+    """Original upload name without extension, safe to use in a download filename"""
+    job_info = transcription_service.get_job_info(job_id)
+    original_filename = job_info.get("filename", "transcription") if job_info else "transcription"
+    base_filename = Path(original_filename).stem
 
-        # Get job info for filename
-        job_info = transcription_service.get_job_info(job_id)
-        original_filename = job_info.get("filename", "transcription") if job_info else "transcription"
-        base_filename = Path(original_filename).stem
+    # Sanitize filename to avoid issues with special characters
+    return re.sub(r'[^\w\-_\.]', '_', base_filename)
 
-        # Sanitize filename to avoid issues with special characters
-        safe_filename = re.sub(r'[^\w\-_\.]', '_', base_filename)
+def artifact_response(artifact: dict, request: Request, download_filename: str) -> Response:
+    """Serve a rendered or streamed export, honouring conditional and Accept-Encoding headers"""
+    # Serve a precompressed variant when the client accepts one
+    encoding = export_service.select_encoding(artifact, request.headers.get("accept-encoding"))
+    cache_headers = {
+        "ETag": export_service.etag(artifact, encoding),
+        "Last-Modified": artifact["last_modified"],
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
 
-        # Create download filename
-        extension = format_converter.get_file_extension(format)
-        download_filename = f"{safe_filename}_transcription{extension}"
+    # Revalidation of an unchanged export costs no body at all
+    if export_service.is_not_modified(
+        artifact,
+        encoding,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since")
+    ):
+        return Response(status_code=304, headers=cache_headers)
 
-        # Return file content with proper UTF-8 encoding
-        content_type = format_converter.get_content_type(format)
+    headers = {
+        "Content-Disposition": f"attachment; filename=\"{download_filename}\"",
+        **cache_headers,
+    }
 
-        # Create response with proper UTF-8 handling
-        headers = {
-            "Content-Disposition": f"attachment; filename=\"{download_filename}\"",
-        }
+    if artifact["body"] is None:
+        # Large exports are rendered while they are sent
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return StreamingResponse(
+            export_service.stream(artifact, encoding),
+            media_type=artifact["content_type"],
+            headers=headers
+        )
+    if encoding:
+        body = artifact["variants"][encoding]
+        headers["Content-Encoding"] = encoding
+    else:
+        body = artifact["body"]
+
+    return Response(
+        content=body,
+        media_type=artifact["content_type"],
+        headers=headers
+    )
+
+async def require_completed(job_id: str):
+    """Raise a 400 unless the job's transcription has completed"""
+    result = await transcription_service.get_transcription_status(job_id)
+    if result.status != TranscriptionStatus.COMPLETED:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Transcription not completed. Status: {result.status}"
+        )
 
-        # Create response with proper UTF-8 handling
+# Declared before /download/{job_id}/{format}, which would otherwise take "bundle" as a format
+@app.get("/download/{job_id}/bundle")
+async def download_bundle(job_id: str, request: Request):
+    """Download every format plus the segments as JSON in one streamed ZIP archive"""
+    try:
+        await require_completed(job_id)
+
+        basename = download_basename(job_id)
+        artifact = await export_service.get_bundle(job_id, basename)
+        return artifact_response(artifact, request, f"{basename}_transcription.zip")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
+
+@app.get("/download/{job_id}/{format}")
+async def download_transcription(job_id: str, format: OutputFormat, request: Request):
+    """Download transcription in specified format"""
+    try:
+        # Check if transcription is completed first
+        await require_completed(job_id)
+
+        # Rendered once per job and format, then served from the export cache
         try:
-            # Ensure content is properly encoded as UTF-8 bytes
-            if isinstance(content, str):
-                content_bytes = content.encode('utf-8')
-            else:
-                content_bytes = content
-
-            return Response(
-                content=content_bytes,
-                media_type=f"{content_type}; charset=utf-8",
-                headers=headers
-            )
+            artifact = await export_service.get_export(job_id, format)
         except Exception as e:
-            print(f"ERROR: Failed to create response: {e}")
-            import traceback
-            print(f"ERROR: Traceback: {traceback.format_exc()}")
+            print(f"ERROR: Failed to get content from transcription service: {e}")
             raise
 
+        extension = format_converter.get_file_extension(format)
+        return artifact_response(artifact, request, f"{download_basename(job_id)}_transcription{extension}")
+
     except HTTPException:
         raise
     except Exception as e:
@@ -186,14 +584,15 @@ async def get_preview(job_id: str, lines: int = 10):
                 detail=f"Transcription not completed. Status: {result.status}"
             )
         
-        preview_segments = result.segments[:lines] if result.segments else []
+        segments = await transcription_service.get_segments(job_id)
+        preview_segments = segments.to_segments(0, lines) if segments else []
         preview_text = result.text[:500] + "..." if result.text and len(result.text) > 500 else result.text
         
         return {
             "job_id": job_id,
             "preview_text": preview_text,
             "preview_segments": preview_segments,
-            "total_segments": len(result.segments) if result.segments else 0,
+            "total_segments": len(segments) if segments else 0,
             "audio_duration": result.audio_duration,
             "confidence": result.confidence
         }
@@ -203,28 +602,61 @@ async def get_preview(job_id: str, lines: int = 10):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Preview failed: {str(e)}")
 
-async def cleanup_after_processing(job_id: str, file_path: str):
-    """Clean up files after transcription is complete or failed"""
-    max_wait = 3600  # 1 hour max wait
-    check_interval = 30  # Check every 30 seconds
-    waited = 0
-    
-    while waited < max_wait:
-        try:
-            result = await transcription_service.get_transcription_status(job_id)
-            if result.status in [TranscriptionStatus.COMPLETED, TranscriptionStatus.ERROR]:
-                # Wait a bit more to allow downloads
-                await asyncio.sleep(300)  # 5 minutes
-                break
-        except:
-            break
-        
-        await asyncio.sleep(check_interval)
-        waited += check_interval
-    
-    # Clean up file and job data
-    file_service.delete_file(file_path)
-    transcription_service.cleanup_job(job_id)
+@app.get("/segments/{job_id}", response_model=SegmentPage)
+async def get_segments(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    start: Optional[float] = Query(None, ge=0, description="Only segments ending after this time (seconds)"),
+    end: Optional[float] = Query(None, ge=0, description="Only segments starting before this time (seconds)")
+):
+    """Get a page of segments, optionally limited to a time window"""
+    try:
+        segments = await transcription_service.get_segments(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if segments is None:
+        raise HTTPException(status_code=400, detail="Transcription not completed")
+
+    # Binary search over the cached table; only the returned page becomes models
+    first, last = segments.window(start, end)
+    first_index = min(first + offset, last)
+    return SegmentPage(
+        job_id=job_id,
+        total_segments=last - first,
+        offset=offset,
+        first_index=first_index,
+        segments=segments.to_segments(first_index, min(first_index + limit, last))
+    )
+
+@app.get("/search", response_model=ArchiveSearchResults)
+async def search_archive(
+    q: str = Query(..., min_length=1, description='Words and "quoted phrases" that must all occur; end a word with * to match it as a prefix'),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Find segments across every archived transcription, best matches first"""
+    if not transcript_archive.enabled:
+        raise HTTPException(status_code=404, detail="Transcript archive is not enabled")
+    try:
+        results = await transcript_archive.search(q, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+    return ArchiveSearchResults(query=q, **results)
+
+@app.get("/search/{job_id}", response_model=SearchResults)
+async def search_transcription(
+    job_id: str,
+    q: str = Query(..., min_length=1, description="Words to find as a phrase; end a word with * to match it as a prefix"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Find where a phrase is spoken in a completed transcription"""
+    try:
+        results = await transcription_service.search(job_id, q, limit)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if results is None:
+        raise HTTPException(status_code=400, detail="Transcription not completed")
+    return results
 
 if __name__ == "__main__":
     import uvicorn
@@ -18,6 +18,31 @@ class UploadResponse(BaseModel):
     message: str
     filename: str
 
+class BatchUploadItem(BaseModel):
+    filename: Optional[str] = None
+    job_id: Optional[str] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None  # HTTP status the file would have failed with on /upload
+
+class BatchUploadResponse(BaseModel):
+    accepted: int
+    failed: int
+    files: List[BatchUploadItem]
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int  # Total bytes the upload will have
+
+class UploadSessionStatus(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    part_size: int  # Suggested bytes per PUT
+    committed_offset: int  # Every byte before this offset has been received
+    received_bytes: int
+    missing_ranges: List[List[int]]  # [start, end) byte ranges still to send
+    expires_at: Optional[float] = None
+
 class TranscriptionStatusResponse(BaseModel):
     job_id: str
     status: TranscriptionStatus
@@ -39,6 +64,56 @@ class TranscriptionResult(BaseModel):
     confidence: Optional[float] = None
     audio_duration: Optional[float] = None
     error: Optional[str] = None
+    queue_position: Optional[int] = None  # Place in the admission queue while queued; 0 once admitted
+
+class JobStatusRecord(BaseModel):
+    job_id: str
+    status: TranscriptionStatus
+    filename: Optional[str] = None
+    error: Optional[str] = None
+    queue_position: Optional[int] = None
+    checked_at: Optional[float] = None  # Last time the status was confirmed with AssemblyAI
+    completed_at: Optional[float] = None
+
+class BulkStatusRequest(BaseModel):
+    ids: List[str]
+
+class BulkStatusResponse(BaseModel):
+    jobs: List[JobStatusRecord]
+    missing: List[str]  # Requested ids that are unknown or already expired
+    refreshed: int  # Stale jobs refreshed from AssemblyAI for this response
+
+class SegmentPage(BaseModel):
+    job_id: str
+    total_segments: int  # Segments in the requested time window (all of them without one)
+    offset: int
+    first_index: int  # Position of the first returned segment in the whole transcript
+    segments: List[SubtitleSegment]
+
+class SearchHit(BaseModel):
+    start: float  # When the first matched word is spoken (seconds)
+    segment_index: int
+    segment: SubtitleSegment
+
+class SearchResults(BaseModel):
+    job_id: str
+    query: str
+    total_hits: int
+    hits: List[SearchHit]
+
+class ArchiveHit(BaseModel):
+    job_id: str
+    filename: Optional[str] = None
+    start: float
+    end: float
+    speaker: Optional[str] = None
+    snippet: str  # Segment text with matched words in [brackets]
+    score: float  # Higher is more relevant
+
+class ArchiveSearchResults(BaseModel):
+    query: str
+    ranked: bool  # False when there were too many matches to rank and the newest are shown
+    hits: List[ArchiveHit]
 
 class DownloadResponse(BaseModel):
     content: str
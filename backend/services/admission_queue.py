@@ -0,0 +1,195 @@
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from fastapi import HTTPException, Request
+from models import TranscriptionStatus, TranscriptionResult
+from config import settings
+from services.transcription_service import transcription_service
+import asyncio
+
+TERMINAL_STATUSES = (TranscriptionStatus.COMPLETED, TranscriptionStatus.ERROR)
+# Clients are not stored with jobs, so jobs restored after a restart share one
+RESTORED_CLIENT = "restored"
+
+class AdmissionQueue:
+    """Bounded queue that admits jobs to AssemblyAI under a global concurrency limit
+
+    Waiting jobs are kept per client and dispatched round-robin, so a burst
+    from one client only delays that client. A slot is held from submission
+    until the job finishes. Limits apply per worker process.
+    """
+
+    def __init__(self):
+        # Client -> waiting job ids; the front client dispatches next
+        self.waiting: "OrderedDict[str, deque]" = OrderedDict()
+        self.job_clients: Dict[str, str] = {}
+        # Submitted, unfinished job -> client
+        self.in_flight: Dict[str, str] = {}
+        # Uploads admitted but not yet enqueued, per client
+        self.reserved: Dict[str, int] = {}
+        self.admitted = 0
+        self.rejected = 0
+        # Callbacks invoked after jobs leave the queue, so positions can be republished
+        self.advance_listeners: List[Callable[[], None]] = []
+        self._tasks = set()
+        transcription_service.status_listeners.append(self._on_status_change)
+
+    @staticmethod
+    def client_key(request: Request) -> str:
+        """Identify the client a request counts against"""
+        if settings.ADMISSION_CLIENT_HEADER:
+            key = request.headers.get(settings.ADMISSION_CLIENT_HEADER)
+            if key:
+                return f"key:{key}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    def _queued(self, client: Optional[str] = None) -> int:
+        if client is None:
+            return len(self.job_clients) + sum(self.reserved.values())
+        return len(self.waiting.get(client, ())) + self.reserved.get(client, 0)
+
+    def _has_room(self, client: str, count: int = 1) -> bool:
+        return (self._queued() + count <= settings.ADMISSION_QUEUE_SIZE
+                and self._queued(client) + count <= settings.ADMISSION_MAX_QUEUED_PER_CLIENT)
+
+    def _reject(self) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(
+            status_code=429,
+            detail="Too many transcriptions waiting; please retry later",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)}
+        )
+
+    def check_room(self, client: str, count: int):
+        """Reject a batch of uploads with a single 429 unless all of them fit in the queue"""
+        if not self._has_room(client, count):
+            raise self._reject()
+
+    @contextmanager
+    def reservation(self, client: str) -> Iterator[None]:
+        """Hold a queue place for an upload in progress, or reject it with 429 when full"""
+        if not self._has_room(client):
+            raise self._reject()
+
+        self.reserved[client] = self.reserved.get(client, 0) + 1
+        try:
+            yield
+        finally:
+            self.reserved[client] -= 1
+            if not self.reserved[client]:
+                del self.reserved[client]
+
+    def enqueue(self, job_id: str, client: str):
+        """Queue a created job for submission; jobs that need none are ignored"""
+        if not transcription_service.needs_submission(job_id):
+            return
+        self.waiting.setdefault(client, deque()).append(job_id)
+        self.job_clients[job_id] = client
+        self._dispatch()
+
+    def restore(self) -> List[str]:
+        """Queue stored jobs still waiting for submission, e.g. after a restart, oldest first"""
+        jobs = transcription_service.jobs
+        waiting = [
+            job_id for job_id in jobs.ids_by_status((TranscriptionStatus.QUEUED,))
+            if job_id not in self.job_clients and job_id not in self.in_flight
+            and transcription_service.needs_submission(job_id)
+        ]
+        waiting.sort(key=lambda job_id: (jobs.get(job_id) or {}).get("queued_at", 0))
+        for job_id in waiting:
+            self.enqueue(job_id, RESTORED_CLIENT)
+        return waiting
+
+    def discard(self, job_id: str):
+        """Forget an expired job, freeing its place or slot"""
+        client = self.job_clients.pop(job_id, None)
+        if client is not None:
+            jobs = self.waiting[client]
+            jobs.remove(job_id)
+            if not jobs:
+                del self.waiting[client]
+            self._notify_advance()
+        elif self.in_flight.pop(job_id, None) is not None:
+            self._dispatch()
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place in the submission order, or None once submitted"""
+        client = self.job_clients.get(job_id)
+        if client is None:
+            return None
+
+        # Round-robin: every client dispatches one job per round, front client first
+        rounds = self.waiting[client].index(job_id)
+        ahead = 0
+        before_own_turn = True
+        for other_client, jobs in self.waiting.items():
+            if other_client == client:
+                before_own_turn = False
+            ahead += min(len(jobs), rounds)
+            if before_own_turn and len(jobs) > rounds:
+                ahead += 1
+        return ahead + 1
+
+    def reported_position(self, job_id: str) -> int:
+        """Queue position to show for a job in status "queued"
+
+        Jobs that have left the admission queue are being submitted or wait
+        in AssemblyAI's own queue; they report position 0.
+        """
+        job_info = transcription_service.get_job_info(job_id) or {}
+        # Duplicate uploads wait for the job that submits their media
+        alias_of = job_info.get("alias_of")
+        return self.position(job_id) or (alias_of and self.position(alias_of)) or 0
+
+    def _dispatch(self):
+        dispatched = False
+        while self.waiting and len(self.in_flight) < settings.ADMISSION_MAX_CONCURRENT:
+            client, jobs = next(iter(self.waiting.items()))
+            job_id = jobs.popleft()
+            del self.job_clients[job_id]
+            if jobs:
+                self.waiting.move_to_end(client)
+            else:
+                del self.waiting[client]
+
+            self.in_flight[job_id] = client
+            self.admitted += 1
+            dispatched = True
+            task = asyncio.create_task(self._submit(job_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if dispatched:
+            self._notify_advance()
+
+    async def _submit(self, job_id: str):
+        if not await transcription_service.submit_job(job_id):
+            # Nothing for this worker to wait on; free the slot
+            if self.in_flight.pop(job_id, None) is not None:
+                self._dispatch()
+
+    def _notify_advance(self):
+        for listener in self.advance_listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"ERROR: Admission queue listener failed: {e}")
+
+    def _on_status_change(self, job_id: str, result: TranscriptionResult):
+        """Free a job's slot once it finishes"""
+        if result.status in TERMINAL_STATUSES and self.in_flight.pop(job_id, None) is not None:
+            self._dispatch()
+
+    def stats(self) -> dict:
+        """Return queue occupancy counters"""
+        return {
+            "waiting": len(self.job_clients),
+            "waiting_clients": len(self.waiting),
+            "in_flight": len(self.in_flight),
+            "reserved": sum(self.reserved.values()),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+# Global instance
+admission_queue = AdmissionQueue()
@@ -0,0 +1,218 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from models import TranscriptionStatus, TranscriptionResult
+from config import settings
+from services.transcription_service import transcription_service
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+
+# Quoted phrases, or single words with an optional trailing * for prefix matching
+QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+WORD = re.compile(r"\w+(?:'\w+)*")
+
+def match_expression(query: str) -> Optional[str]:
+    """Translate a user query into an FTS5 expression that cannot be a syntax error
+
+    Words and "quoted phrases" must all match; a word ending in * matches
+    as a prefix. Everything else is treated as literal text.
+    """
+    parts = []
+    for phrase, word in QUERY_PART.findall(query):
+        if phrase:
+            tokens = WORD.findall(phrase)
+            if tokens:
+                parts.append('"' + " ".join(tokens) + '"')
+            continue
+        tokens = WORD.findall(word)
+        for number, token in enumerate(tokens, 1):
+            prefix = number == len(tokens) and word.endswith("*")
+            parts.append(f'"{token}"*' if prefix else f'"{token}"')
+    return " ".join(parts) or None
+
+class TranscriptArchive:
+    """Full-text archive of every completed transcript, kept after jobs are cleaned up
+
+    Segments are indexed into an SQLite FTS5 table when a job completes and
+    searched with bm25 ranking across all jobs. Each transcript is archived
+    once, under the first job that completes with it; jobs that reuse it
+    for identical media are not archived again. Writes go through a single
+    worker thread; the database is shared by all workers on a host.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS archived_jobs (
+            job_id TEXT PRIMARY KEY,
+            transcript_id TEXT,
+            filename TEXT,
+            completed_at REAL,
+            audio_duration REAL,
+            segment_count INTEGER NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_archived_jobs_transcript_id ON archived_jobs(transcript_id);
+        CREATE VIRTUAL TABLE IF NOT EXISTS archived_segments USING fts5(
+            text,
+            speaker UNINDEXED,
+            job_id UNINDEXED,
+            start UNINDEXED,
+            end UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4'
+        );
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.archived = 0
+        self.failed = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._tasks = set()
+        if not settings.ARCHIVE_ENABLED:
+            return
+
+        try:
+            self._conn = sqlite3.connect(settings.ARCHIVE_PATH, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA busy_timeout={int(settings.JOB_STORE_BUSY_TIMEOUT * 1000)}")
+            self._conn.executescript(self.SCHEMA)
+        except sqlite3.Error as e:
+            # Typically an SQLite build without FTS5
+            print(f"ERROR: Transcript archive unavailable, archive search disabled: {e}")
+            return
+        self.enabled = True
+        transcription_service.status_listeners.append(self._on_status_change)
+
+    def _on_status_change(self, job_id: str, result: TranscriptionResult):
+        if result.status != TranscriptionStatus.COMPLETED:
+            return
+        task = asyncio.create_task(self.archive_job(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def archive_job(self, job_id: str):
+        """Index a completed job's segments; transcripts already archived are skipped"""
+        try:
+            segments = await transcription_service.get_segments(job_id)
+            job_info = transcription_service.get_job_info(job_id)
+            if segments is None or job_info is None:
+                return
+            result = await transcription_service.get_transcription_status(job_id)
+            job = {
+                "job_id": job_id,
+                "transcript_id": job_info.get("transcript_id"),
+                "filename": job_info.get("filename"),
+                "completed_at": job_info.get("completed_at") or time.time(),
+                "audio_duration": result.audio_duration,
+            }
+            loop = asyncio.get_event_loop()
+            if await loop.run_in_executor(self._executor, self._insert, job, segments):
+                self.archived += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"ERROR: Archiving job {job_id} failed: {e}")
+
+    def _insert(self, job: Dict[str, Any], segments) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Every worker hears about completions, and every job sharing a
+                # transcript completes with it, but only the first one archives
+                cursor = self._conn.execute(
+                    """
+                    INSERT OR IGNORE INTO archived_jobs
+                        (job_id, transcript_id, filename, completed_at, audio_duration, segment_count)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (job["job_id"], job["transcript_id"], job["filename"], job["completed_at"],
+                     job["audio_duration"], len(segments))
+                )
+                if cursor.rowcount == 1:
+                    self._conn.executemany(
+                        "INSERT INTO archived_segments (text, speaker, job_id, start, end) VALUES (?, ?, ?, ?, ?)",
+                        ((row.text, row.speaker, job["job_id"], row.start, row.end) for row in segments)
+                    )
+                self._conn.execute("COMMIT")
+                return cursor.rowcount == 1
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def search(self, query: str, limit: int) -> Dict[str, Any]:
+        """Best matching segments across all archived jobs, most relevant first
+
+        When ranking would take longer than ARCHIVE_RANK_TIMEOUT, the newest
+        matches are returned instead and "ranked" is false.
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return {"ranked": True, "hits": []}
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._search, expression, limit)
+
+    def _search(self, expression: str, limit: int) -> Dict[str, Any]:
+        with self._lock:
+            ranked = True
+            deadline = time.monotonic() + settings.ARCHIVE_RANK_TIMEOUT
+            # Ranking scores every matching segment, so very common terms could scan for long
+            self._conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+            try:
+                rows = self._query(expression, "rank", limit)
+            except sqlite3.OperationalError as e:
+                if "interrupted" not in str(e):
+                    raise
+                # Newest segments first only reads as far as the limit
+                ranked = False
+                self._conn.set_progress_handler(None, 0)
+                rows = self._query(expression, "rowid DESC", limit)
+            finally:
+                self._conn.set_progress_handler(None, 0)
+            job_ids = list({row[0] for row in rows})
+            placeholders = ",".join("?" for _ in job_ids)
+            filenames = dict(self._conn.execute(
+                f"SELECT job_id, filename FROM archived_jobs WHERE job_id IN ({placeholders})", job_ids
+            ).fetchall()) if job_ids else {}
+
+        hits = [
+            {
+                "job_id": job_id,
+                "filename": filenames.get(job_id),
+                "start": start,
+                "end": end,
+                "speaker": speaker,
+                "snippet": snippet,
+                # bm25 ranks lower as better; flip it so higher is more relevant
+                "score": -rank,
+            }
+            for job_id, start, end, speaker, snippet, rank in rows
+        ]
+        return {"ranked": ranked, "hits": hits}
+
+    def _query(self, expression: str, order: str, limit: int) -> list:
+        # With a LIMIT, FTS5 keeps only the top rows while it scans
+        return self._conn.execute(
+            f"""
+            SELECT job_id, start, end, speaker, snippet(archived_segments, 0, '[', ']', '...', 16), rank
+            FROM archived_segments
+            WHERE archived_segments MATCH ?
+            ORDER BY {order}
+            LIMIT ?
+            """,
+            (expression, limit)
+        ).fetchall()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return archiving counters"""
+        return {
+            "enabled": self.enabled,
+            "archived": self.archived,
+            "failed": self.failed,
+            "pending": len(self._tasks),
+        }
+
+# Global instance
+transcript_archive = TranscriptArchive()
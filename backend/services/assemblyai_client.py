@@ -0,0 +1,124 @@
+from typing import AsyncIterator, Dict
+from config import settings
+from utils.bulkhead import Bulkhead
+import assemblyai as aai
+import aiofiles
+import asyncio
+import httpx
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class AssemblyAIClient:
+    """Async client for the AssemblyAI REST API over pooled keep-alive connections
+
+    Media submission (uploads and transcript creation) and status calls
+    (transcript fetches) run in separate bulkheads with their own
+    connection pools, so slow uploads cannot hold up status checks.
+    Pass-through uploads, paced by the uploading client, have a bulkhead
+    of their own so they cannot hold up submissions either.
+    Responses are parsed into the SDK's types so callers keep attribute
+    access.
+    """
+
+    def __init__(self):
+        self.submissions = Bulkhead("submissions", settings.SUBMIT_CONCURRENCY)
+        self.polls = Bulkhead("polls", settings.POLL_CONCURRENCY)
+        self.streams = Bulkhead("streams", settings.STREAM_UPLOAD_CONCURRENCY)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _get_client(self, bulkhead: Bulkhead) -> httpx.AsyncClient:
+        # Created lazily so the clients bind to the running event loop
+        client = self._clients.get(bulkhead.name)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=settings.ASSEMBLYAI_BASE_URL,
+                headers={"authorization": settings.ASSEMBLYAI_API_KEY},
+                timeout=httpx.Timeout(
+                    settings.ASSEMBLYAI_TIMEOUT,
+                    write=None,  # Uploads stream for as long as the media takes
+                    pool=settings.ASSEMBLYAI_POOL_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=min(bulkhead.limit, settings.ASSEMBLYAI_MAX_CONNECTIONS),
+                    max_keepalive_connections=settings.ASSEMBLYAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.ASSEMBLYAI_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._clients[bulkhead.name] = client
+        return client
+
+    @staticmethod
+    def _check(response: httpx.Response, action: str):
+        if response.status_code != httpx.codes.OK:
+            try:
+                detail = response.json().get("error") or response.text
+            except ValueError:
+                detail = response.text
+            raise aai.types.TranscriptError(f"Failed to {action}: {response.status_code} {detail}",
+                                            response.status_code)
+
+    @staticmethod
+    async def _parse_transcript(response: httpx.Response) -> aai.types.TranscriptResponse:
+        # Completed transcripts of long recordings take seconds to decode and validate
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, lambda: aai.types.TranscriptResponse.parse_obj(response.json())
+        )
+
+    async def upload(self, chunks: AsyncIterator[bytes]) -> str:
+        """Stream media to AssemblyAI as it is produced and return its upload URL"""
+        return await self._upload(self.submissions, chunks)
+
+    async def upload_stream(self, chunks: AsyncIterator[bytes]) -> str:
+        """Pass media through to AssemblyAI as a client sends it and return its upload URL"""
+        return await self._upload(self.streams, chunks)
+
+    async def _upload(self, bulkhead: Bulkhead, chunks: AsyncIterator[bytes]) -> str:
+        async with bulkhead.slot():
+            response = await self._get_client(bulkhead).post(
+                "/v2/upload",
+                content=chunks,
+                headers={"Content-Type": "application/octet-stream"},
+            )
+        self._check(response, "upload audio file")
+        return response.json()["upload_url"]
+
+    async def upload_file(self, file_path: str) -> str:
+        """Upload a local file without blocking the event loop"""
+        async def read_chunks():
+            async with aiofiles.open(file_path, "rb") as f:
+                while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                    yield chunk
+
+        return await self.upload(read_chunks())
+
+    async def submit(self, audio_url: str, config: aai.TranscriptionConfig) -> aai.types.TranscriptResponse:
+        """Create a transcript for uploaded or hosted media"""
+        request = aai.types.TranscriptRequest(audio_url=audio_url, **config.raw.dict(exclude_none=True))
+        async with self.submissions.slot():
+            response = await self._get_client(self.submissions).post(
+                "/v2/transcript",
+                json=request.dict(exclude_none=True, by_alias=True),
+            )
+        self._check(response, f"submit transcript for {audio_url}")
+        return await self._parse_transcript(response)
+
+    async def get_transcript(self, transcript_id: str) -> aai.types.TranscriptResponse:
+        """Fetch the current state of a transcript"""
+        async with self.polls.slot():
+            response = await self._get_client(self.polls).get(f"/v2/transcript/{transcript_id}")
+        self._check(response, f"retrieve transcript {transcript_id}")
+        return await self._parse_transcript(response)
+
+    def stats(self) -> Dict[str, dict]:
+        """Return per-bulkhead queue depth and wait-time metrics"""
+        return {bulkhead.name: bulkhead.stats() for bulkhead in (self.submissions, self.polls, self.streams)}
+
+    async def close(self):
+        """Close pooled connections"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+# Global instance
+assemblyai_client = AssemblyAIClient()
@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from config import settings
+from utils.chunking import parse_silences
+import asyncio
+import os
+import shutil
+import subprocess
+import time
+
+# Output container and ffmpeg encoder options per codec
+CODECS = {
+    "opus": (".ogg", ["-c:a", "libopus", "-b:a", settings.AUDIO_EXTRACTION_BITRATE, "-application", "voip"]),
+    "flac": (".flac", ["-c:a", "flac", "-sample_fmt", "s16"]),
+}
+
+class AudioService:
+    """Extracts speech-quality audio from uploads with ffmpeg before they are sent upstream
+
+    Video containers carry far more bytes than transcription needs, so their
+    first audio track is transcoded to mono 16 kHz Opus or FLAC in a worker
+    pool. Any failure falls back to uploading the original file. Long
+    recordings can also be split into chunks for parallel transcription.
+    """
+
+    def __init__(self):
+        self.ffmpeg = shutil.which(settings.FFMPEG_PATH)
+        self.ffprobe = shutil.which(settings.FFPROBE_PATH)
+        self.enabled = settings.AUDIO_EXTRACTION_ENABLED and self.ffmpeg is not None
+        if settings.AUDIO_EXTRACTION_ENABLED and self.ffmpeg is None:
+            print(f"DEBUG: ffmpeg not found at '{settings.FFMPEG_PATH}', audio extraction disabled")
+        self.executor = ThreadPoolExecutor(max_workers=settings.AUDIO_EXTRACTION_WORKERS)
+        self.extracted = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.split_files = 0
+        self.chunks = 0
+
+    def should_extract(self, file_path: Optional[str]) -> bool:
+        """Whether a stored upload is worth transcoding before upload"""
+        return (self.enabled and file_path is not None
+                and Path(file_path).suffix.lower() in settings.AUDIO_EXTRACTION_EXTENSIONS)
+
+    def can_split(self, file_path: Optional[str]) -> bool:
+        """Whether a stored upload may be transcribed as parallel chunks"""
+        return (settings.CHUNKED_TRANSCRIPTION_ENABLED and self.ffmpeg is not None
+                and self.ffprobe is not None and file_path is not None)
+
+    def _command(self, source: str, target: str, start: Optional[float] = None,
+                 duration: Optional[float] = None) -> List[str]:
+        _, codec_options = CODECS[settings.AUDIO_EXTRACTION_CODEC]
+        seek = ["-ss", f"{start:.3f}", "-t", f"{duration:.3f}"] if start is not None else []
+        return [
+            self.ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            *seek, "-i", source,
+            "-map", "0:a:0", "-vn", "-ac", "1", "-ar", "16000",
+            *codec_options,
+            target,
+        ]
+
+    def _run(self, command: List[str]) -> str:
+        completed = subprocess.run(
+            command,
+            check=True,
+            capture_output=True,
+            timeout=settings.AUDIO_EXTRACTION_TIMEOUT,
+        )
+        return completed.stderr.decode(errors="replace")
+
+    def _transcode(self, source: str, target: str, start: Optional[float] = None,
+                   duration: Optional[float] = None):
+        self._run(self._command(source, target, start, duration))
+
+    async def _in_pool(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def probe_duration(self, file_path: str) -> Optional[float]:
+        """Media duration in seconds, or None if ffprobe cannot tell"""
+        def probe() -> str:
+            completed = subprocess.run(
+                [self.ffprobe, "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+                check=True, capture_output=True, timeout=settings.AUDIO_EXTRACTION_TIMEOUT,
+            )
+            return completed.stdout.decode().strip()
+
+        try:
+            return float(await self._in_pool(probe))
+        except Exception as e:
+            print(f"ERROR: Could not read duration of {file_path}: {e}")
+            return None
+
+    async def detect_silences(self, file_path: str) -> List[tuple]:
+        """(start, end) seconds of the pauses in a file's first audio track"""
+        command = [
+            self.ffmpeg, "-nostdin", "-hide_banner", "-i", file_path, "-map", "0:a:0", "-vn",
+            "-af", f"silencedetect=noise={settings.CHUNK_SILENCE_NOISE}:d={settings.CHUNK_SILENCE_MIN_DURATION}",
+            "-f", "null", "-",
+        ]
+        try:
+            return parse_silences(await self._in_pool(self._run, command))
+        except Exception as e:
+            # Chunks are then cut at fixed offsets
+            print(f"ERROR: Silence detection failed for {file_path}: {e}")
+            return []
+
+    async def split(self, file_path: str, plan: List[Dict[str, float]]) -> List[str]:
+        """Write each planned chunk of a file as a separate audio file, transcoding in parallel"""
+        extension, _ = CODECS[settings.AUDIO_EXTRACTION_CODEC]
+        stem = Path(file_path).stem
+        targets = [str(Path(file_path).with_name(f"{stem}.chunk{index}{extension}")) for index in range(len(plan))]
+        outcomes = await asyncio.gather(*[
+            self._in_pool(self._transcode, file_path, target, chunk["start"], chunk["end"] - chunk["start"])
+            for chunk, target in zip(plan, targets)
+        ], return_exceptions=True)
+
+        failure = next((outcome for outcome in outcomes if isinstance(outcome, Exception)), None)
+        if failure is not None:
+            for target in targets:
+                self._remove(target)
+            raise Exception(f"Failed to split {file_path}: {failure}")
+
+        self.split_files += 1
+        self.chunks += len(targets)
+        return targets
+
+    async def extract_audio(self, file_path: str) -> Optional[str]:
+        """Transcode a file's audio track next to it; None when the original should be used"""
+        if not self.should_extract(file_path):
+            return None
+
+        extension, _ = CODECS[settings.AUDIO_EXTRACTION_CODEC]
+        target = str(Path(file_path).with_name(f"{Path(file_path).stem}.audio{extension}"))
+        started = time.time()
+        try:
+            await self._in_pool(self._transcode, file_path, target)
+        except Exception as e:
+            detail = e.stderr.decode(errors="replace").strip() if isinstance(e, subprocess.CalledProcessError) else e
+            print(f"ERROR: Audio extraction failed for {file_path}: {detail}")
+            self.failed += 1
+            self._remove(target)
+            return None
+
+        original_size = os.path.getsize(file_path)
+        extracted_size = os.path.getsize(target)
+        if extracted_size >= original_size:
+            # Nothing to gain, e.g. a video that is mostly audio already
+            self._remove(target)
+            return None
+
+        self.extracted += 1
+        self.bytes_in += original_size
+        self.bytes_out += extracted_size
+        self.seconds += time.time() - started
+        print(f"DEBUG: Extracted audio from {file_path}: {original_size} -> {extracted_size} bytes")
+        return target
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return extraction counters"""
+        return {
+            "enabled": self.enabled,
+            "extracted": self.extracted,
+            "failed": self.failed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "seconds": self.seconds,
+            "split_files": self.split_files,
+            "chunks": self.chunks,
+        }
+
+# Global instance
+audio_service = AudioService()
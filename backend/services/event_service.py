@@ -0,0 +1,143 @@
+from typing import Dict, Any, Set, AsyncIterator
+from models import TranscriptionStatus, TranscriptionResult
+from config import settings
+from services.transcription_service import transcription_service
+from services.admission_queue import admission_queue
+import asyncio
+import json
+
+TERMINAL_STATUSES = (TranscriptionStatus.COMPLETED, TranscriptionStatus.ERROR)
+# Events after which a stream ends
+FINAL_EVENTS = ("result", "expired")
+
+class JobEventBroker:
+    """Fans job status transitions from the job poller out to every connected event stream"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._tasks = set()
+        transcription_service.status_listeners.append(self.publish_result)
+        admission_queue.advance_listeners.append(self.publish_queue_positions)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Register a new listener for a job's events"""
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        """Remove a listener, forgetting the job once nobody watches it"""
+        queues = self.subscribers.get(job_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[job_id]
+
+    def publish_result(self, job_id: str, result: TranscriptionResult):
+        """Queue status (and final result) events for every listener of a job"""
+        queues = self.subscribers.get(job_id)
+        if not queues:
+            return
+
+        for queue in queues:
+            queue.put_nowait(("status", self._status_payload(result)))
+        if result.status in TERMINAL_STATUSES:
+            # The summary reads the stored segments, so it follows once they are loaded
+            task = asyncio.create_task(self._publish_summary(result))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _publish_summary(self, result: TranscriptionResult):
+        summary = await self._result_summary(result)
+        for queue in self.subscribers.get(result.job_id, ()):
+            queue.put_nowait(("result", summary))
+
+    def publish_queue_positions(self):
+        """Tell listeners of jobs still waiting for admission where they now stand"""
+        for job_id, queues in self.subscribers.items():
+            position = admission_queue.position(job_id)
+            if position is None:
+                continue
+            payload = {"job_id": job_id, "status": TranscriptionStatus.QUEUED.value, "queue_position": position}
+            for queue in queues:
+                queue.put_nowait(("status", payload))
+
+    @staticmethod
+    def _status_payload(result: TranscriptionResult) -> Dict[str, Any]:
+        payload = {"job_id": result.job_id, "status": result.status.value}
+        if result.status == TranscriptionStatus.QUEUED:
+            payload["queue_position"] = admission_queue.reported_position(result.job_id)
+        if result.error:
+            payload["error"] = result.error
+        return payload
+
+    @staticmethod
+    async def _result_summary(result: TranscriptionResult) -> Dict[str, Any]:
+        return {
+            "job_id": result.job_id,
+            "status": result.status.value,
+            "error": result.error,
+            "total_segments": await transcription_service.segment_count(result.job_id),
+            "text_length": len(result.text) if result.text else 0,
+            "audio_duration": result.audio_duration,
+            "confidence": result.confidence,
+        }
+
+    async def initial_events(self, job_id: str) -> list:
+        """Events describing a job's current state for a newly connected client"""
+        job_info = transcription_service.get_job_info(job_id)
+        if job_info is None:
+            return [("expired", {"job_id": job_id})]
+        if job_info["status"] in TERMINAL_STATUSES:
+            # Served from the result cache unless it was evicted
+            result = await transcription_service.get_transcription_status(job_id)
+            if result.status in TERMINAL_STATUSES:
+                return [("status", self._status_payload(result)), ("result", await self._result_summary(result))]
+
+        return [("status", self._status_payload(TranscriptionResult(job_id=job_id, status=job_info["status"])))]
+
+    async def stream(self, job_id: str, is_disconnected) -> AsyncIterator[str]:
+        """Yield Server-Sent Events for a job until it finishes or the client leaves"""
+        queue = self.subscribe(job_id)
+        # Submission announces a status the client may already have been sent
+        last_status = None
+        try:
+            for event, data in await self.initial_events(job_id):
+                yield self._format_event(event, data)
+                if event in FINAL_EVENTS:
+                    return
+                last_status = data
+
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(),
+                        timeout=settings.EVENT_HEARTBEAT_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    if transcription_service.get_job_info(job_id) is None:
+                        yield self._format_event("expired", {"job_id": job_id})
+                        return
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if event == "status":
+                    if data == last_status:
+                        continue
+                    last_status = data
+                yield self._format_event(event, data)
+                if event in FINAL_EVENTS:
+                    return
+        finally:
+            self.unsubscribe(job_id, queue)
+
+    @staticmethod
+    def _format_event(event: str, data: Dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Global instance
+job_event_broker = JobEventBroker()
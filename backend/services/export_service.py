@@ -0,0 +1,231 @@
+from typing import Dict, Any, Iterator, Optional, Tuple
+from email.utils import formatdate, parsedate_to_datetime
+from models import OutputFormat
+from config import settings
+from services.transcription_service import transcription_service
+from utils.format_converter import format_converter
+from utils.lru_cache import SizedLRUCache
+from utils.zip_stream import stream_zip
+import asyncio
+import gzip
+import hashlib
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Per-cue overhead of a rendered export on top of the cue text (index, timings, labels)
+CUE_OVERHEAD_BYTES = 48
+
+class ExportService:
+    """Renders subtitle exports once per (job, format) and serves them from memory
+
+    Exports estimated above EXPORT_STREAM_MIN_BYTES are not cached; they
+    are rendered (and compressed) chunk by chunk while the response streams.
+    """
+
+    def __init__(self):
+        self.cache = SizedLRUCache(max_bytes=settings.EXPORT_CACHE_MAX_BYTES)
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        # Requests holding or waiting for each lock; it is dropped once none are left
+        self._lock_users: Dict[Tuple[str, str], int] = {}
+
+    async def get_export(self, job_id: str, format_type: OutputFormat) -> Dict[str, Any]:
+        """Return the rendered export for a job, rendering it on first use
+
+        Large exports come back unrendered, with a "chunks" iterator instead
+        of a "body"; pass them to stream().
+        """
+        key = (job_id, format_type.value)
+        artifact = self.cache.get(key)
+        if artifact is not None:
+            return artifact
+
+        # Concurrent first downloads of the same export render it only once
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                artifact = self.cache.get(key)
+                if artifact is not None:
+                    return artifact
+
+                chunks = await transcription_service.get_subtitle_export(job_id, format_type.value)
+                job_info = transcription_service.get_job_info(job_id) or {}
+                last_modified = job_info.get("completed_at") or time.time()
+
+                segments = await transcription_service.get_segments(job_id)
+                estimated_size = len(segments.text) + CUE_OVERHEAD_BYTES * len(segments) if segments else 0
+                if estimated_size >= settings.EXPORT_STREAM_MIN_BYTES:
+                    content_type = f"{format_converter.get_content_type(format_type)}; charset=utf-8"
+                    return self._stream_artifact(job_id, chunks, format_type.value, content_type, last_modified,
+                                                 ("br", "gzip") if brotli is not None else ("gzip",))
+
+                loop = asyncio.get_event_loop()
+                artifact = await loop.run_in_executor(
+                    None,
+                    lambda: self._build_artifact(chunks, format_type, last_modified)
+                )
+                self.cache.put(key, artifact, artifact["size"])
+                return artifact
+        finally:
+            self._lock_users[key] -= 1
+            if not self._lock_users[key]:
+                del self._lock_users[key]
+                del self._locks[key]
+
+    def _build_artifact(self, chunks: Iterator[bytes], format_type: OutputFormat,
+                        last_modified: float) -> Dict[str, Any]:
+        """Render an export and precompute its compressed variants"""
+        body = b"".join(chunks)
+        variants = {}
+
+        if len(body) >= settings.EXPORT_COMPRESSION_MIN_BYTES:
+            variants["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=5)
+
+        return {
+            "body": body,
+            "variants": variants,
+            "encodings": tuple(variants),
+            "etag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            "last_modified": formatdate(last_modified, usegmt=True),
+            "last_modified_ts": int(last_modified),
+            "content_type": f"{format_converter.get_content_type(format_type)}; charset=utf-8",
+            "size": len(body) + sum(len(v) for v in variants.values()),
+        }
+
+    async def get_bundle(self, job_id: str, basename: str) -> Dict[str, Any]:
+        """Describe a ZIP archive of every export format plus the segments as JSON
+
+        All entries are rendered from the same segment table while the
+        archive streams; bundles are never cached.
+        """
+        result = await transcription_service.get_transcription_status(job_id)
+        segments = await transcription_service.get_segments(job_id)
+        if not segments:
+            raise Exception("No segments available for export")
+        job_info = transcription_service.get_job_info(job_id) or {}
+        last_modified = job_info.get("completed_at") or time.time()
+
+        entries = [
+            (f"{basename}_transcription{format_converter.get_file_extension(format_type)}",
+             format_converter.render(format_type, result.text, segments))
+            for format_type in OutputFormat
+        ]
+        entries.append((f"{basename}_segments.json", format_converter.render_json(segments)))
+        # Entries are deflated already, so the archive is not compressed again
+        return self._stream_artifact(job_id, stream_zip(entries, last_modified), "bundle",
+                                     "application/zip", last_modified, ())
+
+    @staticmethod
+    def _stream_artifact(job_id: str, chunks: Iterator[bytes], name: str, content_type: str,
+                         last_modified: float, encodings: Tuple[str, ...]) -> Dict[str, Any]:
+        """Describe an export that is rendered while it is sent"""
+        # A finished job's export never changes, so its identity stands in for a content hash
+        identity = f"{job_id}:{name}:{last_modified}".encode()
+        return {
+            "body": None,
+            "chunks": chunks,
+            "encodings": encodings,
+            "etag": f'"{hashlib.sha256(identity).hexdigest()[:32]}"',
+            "last_modified": formatdate(last_modified, usegmt=True),
+            "last_modified_ts": int(last_modified),
+            "content_type": content_type,
+        }
+
+    @staticmethod
+    def stream(artifact: Dict[str, Any], encoding: Optional[str]) -> Iterator[bytes]:
+        """Yield a streamed export's chunks, compressing them on the fly if requested"""
+        chunks = artifact["chunks"]
+        if encoding == "gzip":
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # gzip container, mtime 0
+            for chunk in chunks:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+        elif encoding == "br":
+            compressor = brotli.Compressor(quality=5)
+            for chunk in chunks:
+                data = compressor.process(chunk)
+                if data:
+                    yield data
+            yield compressor.finish()
+        else:
+            yield from chunks
+
+    @staticmethod
+    def etag(artifact: Dict[str, Any], encoding: Optional[str]) -> str:
+        """Entity tag of one representation of an export; each content coding has its own"""
+        if encoding is None:
+            return artifact["etag"]
+        return f'{artifact["etag"][:-1]}-{encoding}"'
+
+    @classmethod
+    def is_not_modified(cls, artifact: Dict[str, Any], encoding: Optional[str],
+                        if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Evaluate conditional request headers against the representation being served"""
+        if if_none_match:
+            etag = cls.etag(artifact, encoding)
+            for candidate in if_none_match.split(","):
+                candidate = candidate.strip()
+                if candidate.startswith("W/"):
+                    candidate = candidate[2:]
+                if candidate == "*" or candidate == etag:
+                    return True
+            # If-Modified-Since is ignored when If-None-Match is present
+            return False
+
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return artifact["last_modified_ts"] <= since
+
+        return False
+
+    @staticmethod
+    def select_encoding(artifact: Dict[str, Any], accept_encoding: Optional[str]) -> Optional[str]:
+        """Pick the best precompressed variant accepted by the client"""
+        if not accept_encoding or not artifact["encodings"]:
+            return None
+
+        accepted = {}
+        for part in accept_encoding.split(","):
+            pieces = part.strip().split(";")
+            coding = pieces[0].strip().lower()
+            quality = 1.0
+            for param in pieces[1:]:
+                name, _, value = param.strip().partition("=")
+                if name == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if coding:
+                accepted[coding] = quality
+
+        best = None
+        best_quality = 0.0
+        # Server preference order breaks ties between equally weighted codings
+        for coding in ("br", "gzip"):
+            if coding not in artifact["encodings"]:
+                continue
+            quality = accepted.get(coding, accepted.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+
+    def invalidate(self, job_id: str):
+        """Drop all cached exports of a job"""
+        for format_type in OutputFormat:
+            self.cache.pop((job_id, format_type.value))
+
+# Global instance
+export_service = ExportService()
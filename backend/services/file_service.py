@@ -1,25 +1,41 @@
 import os
 import aiofiles
+import hashlib
+import re
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Tuple, AsyncIterator, Dict, Any
 from fastapi import UploadFile, HTTPException
 from config import settings
+from services.job_store import job_store
 import asyncio
 import time
 
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+# Received bytes are buffered up to this size before each positioned write
+UPLOAD_WRITE_BUFFER = 1024 * 1024
+# Windows opens descriptors in text mode unless asked otherwise
+O_BINARY = getattr(os, "O_BINARY", 0)
+
 class FileService:
     def __init__(self):
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.upload_dir.mkdir(exist_ok=True)
+        # Resumable upload sessions are shared with other workers through the job store
+        self.store = job_store
+        self._tasks = set()
     
     def validate_file(self, file: UploadFile) -> bool:
         """Validate uploaded file type and size"""
-        if not file.filename:
+        return self.validate_filename(file.filename)
+    
+    def validate_filename(self, filename: Optional[str]) -> bool:
+        """Validate the type of an uploaded file from its name"""
+        if not filename:
             raise HTTPException(status_code=400, detail="No filename provided")
         
         # Check file extension
-        file_ext = Path(file.filename).suffix.lower()
+        file_ext = Path(filename).suffix.lower()
         if file_ext not in settings.ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400, 
@@ -28,18 +44,14 @@ class FileService:
         
         return True
     
-    async def save_upload_file(self, file: UploadFile) -> str:
-        """Save uploaded file temporarily and return file path"""
+    async def save_upload_file(self, file: UploadFile) -> Tuple[str, str]:
+        """Save uploaded file temporarily and return its path and SHA-256 content hash"""
         self.validate_file(file)
+        file_path = self.new_upload_path(file.filename)
         
-        # Generate unique filename
-        file_id = str(uuid.uuid4())
-        file_ext = Path(file.filename).suffix.lower()
-        temp_filename = f"{file_id}{file_ext}"
-        file_path = self.upload_dir / temp_filename
-        
-        # Check file size while reading
+        # Check file size and hash the content while reading
         total_size = 0
+        digest = hashlib.sha256()
         async with aiofiles.open(file_path, 'wb') as f:
             while chunk := await file.read(8192):  # Read in 8KB chunks
                 total_size += len(chunk)
@@ -52,10 +64,237 @@ class FileService:
                         status_code=413, 
                         detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / 1024 / 1024:.1f}MB"
                     )
+                digest.update(chunk)
                 await f.write(chunk)
         
-        return str(file_path)
+        return str(file_path), digest.hexdigest()
+    
+    def new_upload_path(self, filename: str) -> Path:
+        """Generate a unique temporary path keeping the upload's extension"""
+        file_id = str(uuid.uuid4())
+        file_ext = Path(filename).suffix.lower()
+        return self.upload_dir / f"{file_id}{file_ext}"
+    
+    async def tee_stream(self, chunks: AsyncIterator[bytes], stats: dict,
+                         file_path: Optional[Path] = None) -> AsyncIterator[bytes]:
+        """Pass upload chunks through, enforcing the size limit and optionally copying them to disk
+
+        stats receives the running size and, once the stream is exhausted, its SHA-256 hash.
+        """
+        stats["size"] = 0
+        digest = hashlib.sha256()
+        f = await aiofiles.open(file_path, 'wb') if file_path else None
+        try:
+            async for chunk in chunks:
+                stats["size"] += len(chunk)
+                if stats["size"] > settings.MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413, 
+                        detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / 1024 / 1024:.1f}MB"
+                    )
+                digest.update(chunk)
+                if f:
+                    await f.write(chunk)
+                yield chunk
+            stats["sha256"] = digest.hexdigest()
+        except BaseException:
+            if f:
+                await f.close()
+                f = None
+                if file_path.exists():
+                    file_path.unlink()
+            raise
+        finally:
+            if f:
+                await f.close()
     
+    async def create_upload_session(self, filename: Optional[str], size: int) -> Dict[str, Any]:
+        """Start a resumable upload into a file preallocated to its full size
+
+        Byte ranges may then arrive in any order, in parallel and at any
+        worker, through write_upload_range until finish_upload_session. The
+        session lives in the job store and the file in the shared UPLOAD_DIR.
+        """
+        self.validate_filename(filename)
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="Upload size must be positive")
+        if size > settings.MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / 1024 / 1024:.1f}MB"
+            )
+
+        file_path = self.new_upload_path(filename)
+        fd = os.open(file_path, os.O_RDWR | os.O_CREAT | os.O_EXCL | O_BINARY, 0o644)
+        try:
+            # Sparse on most filesystems; ranges fill it in place
+            os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+        now = time.time()
+        session = {
+            "upload_id": str(uuid.uuid4()),
+            "filename": filename,
+            "size": size,
+            "file_path": str(file_path),
+            # Sorted, disjoint [start, end) byte ranges written so far
+            "ranges": [],
+            "created_at": now,
+            "expires_at": now + settings.UPLOAD_SESSION_TTL,
+        }
+        await self.store.call(self.store.save_upload_session, session["upload_id"], session)
+        return session
+
+    def get_upload_session(self, upload_id: str) -> Dict[str, Any]:
+        """Return an open upload session or raise 404"""
+        session = self.store.get_upload_session(upload_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return session
+
+    @staticmethod
+    def parse_content_range(header: Optional[str], size: int) -> Tuple[int, int]:
+        """Parse a Content-Range header ("bytes 0-1023/4096") into a [start, end) byte range"""
+        match = CONTENT_RANGE.fullmatch((header or "").strip())
+        if not match:
+            raise HTTPException(status_code=400, detail="Content-Range header required, e.g. bytes 0-1023/4096")
+        start, last, total = match.groups()
+        start, end = int(start), int(last) + 1
+        if start >= end or end > size or (total != "*" and int(total) != size):
+            raise HTTPException(
+                status_code=416,
+                detail=f"Content-Range outside the upload of {size} bytes",
+                headers={"Content-Range": f"bytes */{size}"}
+            )
+        return start, end
+
+    async def write_upload_range(self, upload_id: str, start: int, end: int,
+                                 chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Write a byte range of an upload at its offset as the chunks arrive
+
+        Bytes written before a dropped connection stay recorded, so only the
+        rest of the range has to be sent again. Each recorded range also
+        extends the session's idle deadline.
+        """
+        session = self.get_upload_session(upload_id)
+        loop = asyncio.get_event_loop()
+        try:
+            fd = await loop.run_in_executor(None, os.open, session["file_path"], os.O_WRONLY | O_BINARY)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        position = start
+        buffer = bytearray()
+
+        async def flush():
+            nonlocal session, position
+            data = bytes(buffer)
+            buffer.clear()
+            await loop.run_in_executor(None, self._write_at, fd, data, position)
+            session = await self.store.call(
+                self.store.add_upload_range, upload_id, position, position + len(data),
+                time.time() + settings.UPLOAD_SESSION_TTL
+            )
+            if session is None:
+                # Completed or aborted meanwhile
+                raise HTTPException(status_code=404, detail="Upload session not found")
+            position += len(data)
+
+        try:
+            async for chunk in chunks:
+                if position + len(buffer) + len(chunk) > end:
+                    raise HTTPException(status_code=400, detail="Request body is longer than its Content-Range")
+                buffer += chunk
+                if len(buffer) >= UPLOAD_WRITE_BUFFER:
+                    await flush()
+            if buffer:
+                await flush()
+            if position != end:
+                raise HTTPException(status_code=400, detail="Request body is shorter than its Content-Range")
+        finally:
+            os.close(fd)
+        return session
+
+    @staticmethod
+    def _write_at(fd: int, data: bytes, position: int):
+        # Each request writes through its own descriptor, one buffer at a time,
+        # so seeking first is safe; os.pwrite is not available on Windows
+        os.lseek(fd, position, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+
+    @staticmethod
+    def upload_progress(session: Dict[str, Any]) -> Dict[str, Any]:
+        """Committed offset, received byte count and missing ranges of an upload session"""
+        ranges = session["ranges"]
+        missing = []
+        offset = 0
+        for start, end in ranges:
+            if start > offset:
+                missing.append((offset, start))
+            offset = end
+        if offset < session["size"]:
+            missing.append((offset, session["size"]))
+        return {
+            # Every byte before this offset has been written
+            "committed_offset": ranges[0][1] if ranges and ranges[0][0] == 0 else 0,
+            "received_bytes": sum(end - start for start, end in ranges),
+            "missing_ranges": missing,
+        }
+
+    async def finish_upload_session(self, upload_id: str) -> Tuple[str, str]:
+        """Close a fully received upload and return its path and SHA-256 content hash
+
+        A range still being written at this point can only repeat bytes
+        that were already received, since every byte has been recorded.
+        """
+        session = self.get_upload_session(upload_id)
+        received = self.upload_progress(session)["received_bytes"]
+        if received != session["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: {received} of {session['size']} bytes received"
+            )
+
+        # Only one request, on any worker, gets to turn the session into a job
+        if await self.store.call(self.store.take_upload_session, upload_id) is None:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        loop = asyncio.get_event_loop()
+        content_hash = await loop.run_in_executor(None, self._hash_file, session["file_path"])
+        return session["file_path"], content_hash
+
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(UPLOAD_WRITE_BUFFER):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    async def abort_upload_session(self, upload_id: str) -> bool:
+        """Discard an upload session and its partial file"""
+        session = await self.store.call(self.store.take_upload_session, upload_id)
+        if session is None:
+            return False
+        self.delete_file(session["file_path"])
+        return True
+
+    def expire_upload_session(self, upload_id: str) -> Optional[float]:
+        """Abort an upload session past its deadline, or return the later deadline it has now
+
+        Any worker may have extended the deadline since this one scheduled it.
+        """
+        session = self.store.get_upload_session(upload_id)
+        if session is None:
+            return None
+        if session["expires_at"] > time.time():
+            return session["expires_at"]
+        task = asyncio.create_task(self.abort_upload_session(upload_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return None
+
     def delete_file(self, file_path: str) -> bool:
         """Delete a file safely"""
         try:
@@ -67,21 +306,16 @@ class FileService:
             print(f"Error deleting file {file_path}: {e}")
         return False
     
-    async def cleanup_old_files(self):
-        """Clean up files older than retention period"""
+    def list_upload_files(self) -> List[Tuple[str, float]]:
+        """List files in the upload directory with their modification times"""
+        files = []
         try:
-            current_time = time.time()
             for file_path in self.upload_dir.iterdir():
                 if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > settings.FILE_RETENTION:
-                        try:
-                            file_path.unlink()
-                            print(f"Cleaned up old file: {file_path}")
-                        except Exception as e:
-                            print(f"Error cleaning up file {file_path}: {e}")
+                    files.append((str(file_path), file_path.stat().st_mtime))
         except Exception as e:
-            print(f"Error during cleanup: {e}")
+            print(f"Error listing upload directory: {e}")
+        return files
     
     def get_file_info(self, file_path: str) -> Optional[dict]:
         """Get file information"""
@@ -0,0 +1,256 @@
+from typing import Dict, Any, List, Tuple, Optional
+from models import TranscriptionStatus, TranscriptionResult
+from config import settings
+from services.transcription_service import transcription_service
+import asyncio
+import heapq
+import time
+
+TERMINAL_STATUSES = (TranscriptionStatus.COMPLETED, TranscriptionStatus.ERROR)
+
+class JobPoller:
+    """Single scheduler that polls every unfinished job on an adaptive schedule
+
+    With a shared job store each worker runs a poller, but a lease in the
+    store lets only one of them poll a given job. The others just watch the
+    stored status and relay its changes to their local listeners.
+    """
+
+    def __init__(self):
+        # (due time, job id) pairs; stale entries are skipped using self.due
+        self.heap: List[Tuple[float, str]] = []
+        self.due: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}
+        # Last status seen for jobs polled by another worker
+        self.observed: Dict[str, TranscriptionStatus] = {}
+        self.polls = 0
+        # Same owner as submissions, so the poll lease takes over the submission claim
+        self.owner = transcription_service.owner
+        self._next_rescan = 0.0
+        self._task = None
+        self._in_flight = set()
+        # Out-of-schedule polls started by refresh_now, by job
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        transcription_service.status_listeners.append(self._on_status_change)
+
+    def _on_status_change(self, job_id: str, result: TranscriptionResult):
+        """Track new unfinished jobs and forget finished ones"""
+        if result.status in TERMINAL_STATUSES:
+            self.untrack(job_id)
+        elif job_id not in self.due:
+            self.track(job_id)
+
+    def track(self, job_id: str):
+        """Start polling a job"""
+        job_info = transcription_service.get_job_info(job_id)
+        if job_info is None or job_info["transcript_id"] is None:
+            # Jobs still waiting for admission have nothing to poll yet
+            return
+        now = time.time()
+        self._schedule(job_id, now + self.next_interval(job_info, now))
+
+    def untrack(self, job_id: str):
+        """Stop polling a job; its heap entry is dropped lazily"""
+        self.due.pop(job_id, None)
+        self.failures.pop(job_id, None)
+        self.observed.pop(job_id, None)
+
+    def lease_duration(self) -> float:
+        """How long a poll claims a job; outlasts the longest interval between polls"""
+        longest = settings.POLL_MAX_INTERVAL
+        if transcription_service.webhook_url:
+            longest = max(longest, settings.WEBHOOK_FALLBACK_POLL_INTERVAL)
+        return 2 * longest
+
+    def rescan(self):
+        """Pick up unfinished jobs from the store, e.g. after a restart or from other workers"""
+        for job_id in transcription_service.jobs.ids_by_status(
+            (TranscriptionStatus.QUEUED, TranscriptionStatus.PROCESSING)
+        ):
+            if job_id not in self.due:
+                self.track(job_id)
+
+    def _schedule(self, job_id: str, due: float):
+        self.due[job_id] = due
+        heapq.heappush(self.heap, (due, job_id))
+        # Wake the loop if this job is now the earliest one
+        if self._wakeup is not None and self.heap[0][1] == job_id:
+            self._wakeup.set()
+
+    def next_interval(self, job_info: Dict[str, Any], now: float) -> float:
+        """Seconds until the next poll of a job"""
+        chunks = len(job_info.get("chunks") or ()) or 1
+        if transcription_service.webhook_url and chunks == 1:
+            # Webhooks report completion; polling only catches lost callbacks
+            return float(settings.WEBHOOK_FALLBACK_POLL_INTERVAL)
+
+        # Rough turnaround estimate from the upload size; chunks are transcribed in parallel
+        audio_seconds = job_info.get("file_size", 0) / settings.POLL_ASSUMED_BYTES_PER_SECOND / chunks
+        expected_finish = (
+            job_info["started_at"]
+            + settings.POLL_BASE_TURNAROUND
+            + audio_seconds * settings.POLL_TURNAROUND_RATIO
+        )
+
+        remaining = expected_finish - now
+        if remaining > 0:
+            # Sparse polls while far from the expected finish, tighter as it approaches
+            interval = remaining / 4
+        else:
+            # Overdue jobs back off gradually
+            interval = settings.POLL_MIN_INTERVAL - remaining / 4
+
+        return max(settings.POLL_MIN_INTERVAL, min(interval, settings.POLL_MAX_INTERVAL))
+
+    def start(self):
+        """Start the poller task"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        failures = 0
+        while True:
+            try:
+                timeout = self._run_due()
+                failures = 0
+            except Exception as e:
+                # E.g. a locked job store; the loop must outlive it or nothing is polled again
+                failures += 1
+                timeout = self._backoff(failures)
+                print(f"ERROR: Job poller iteration failed ({failures} in a row), retrying in {timeout:.1f}s: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _run_due(self) -> float:
+        """Start the polls that are due and return the seconds until the next one"""
+        now = time.time()
+        if now >= self._next_rescan:
+            self.rescan()
+            self._next_rescan = now + settings.POLL_RESCAN_INTERVAL
+
+        due_jobs = []
+        while self.heap and self.heap[0][0] <= now:
+            due, job_id = heapq.heappop(self.heap)
+            if self.due.get(job_id) == due:
+                due_jobs.append(job_id)
+
+        # Polls run in the background so a slow one never delays the schedule
+        for job_id in due_jobs:
+            # Concurrency is bounded by the AssemblyAI client's poll bulkhead
+            task = asyncio.create_task(self._poll(job_id))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+        return min(self.heap[0][0], self._next_rescan) - now if self.heap else self._next_rescan - now
+
+    @staticmethod
+    def _backoff(failures: int) -> float:
+        return min(settings.POLL_MIN_INTERVAL * 2 ** failures, settings.POLL_MAX_INTERVAL)
+
+    def is_stale(self, job_info: Dict[str, Any], now: float) -> bool:
+        """Whether a submitted, unfinished job has missed its scheduled poll by more than STATUS_STALE_AFTER
+
+        The schedule comes from next_interval, so a job waiting for its
+        webhook is not stale until its fallback poll is overdue.
+        """
+        if job_info["transcript_id"] is None or job_info["status"] in TERMINAL_STATUSES:
+            return False
+        last_checked = job_info.get("checked_at") or job_info["started_at"]
+        next_check = last_checked + self.next_interval(job_info, last_checked)
+        return now - next_check > settings.STATUS_STALE_AFTER
+
+    async def refresh_now(self, job_ids: List[str], timeout: float) -> int:
+        """Poll jobs right away, all at once, and wait up to timeout seconds for them
+
+        Polls still running after the timeout finish in the background. A
+        job already being refreshed is not polled a second time. Returns
+        the number of jobs that finished refreshing in time.
+        """
+        tasks = []
+        for job_id in job_ids:
+            task = self._refreshing.get(job_id)
+            if task is None:
+                # Concurrency is bounded by the AssemblyAI client's poll bulkhead
+                task = asyncio.create_task(self._poll(job_id))
+                self._refreshing[job_id] = task
+                self._in_flight.add(task)
+                task.add_done_callback(lambda done, job_id=job_id: self._refresh_done(job_id, done))
+            tasks.append(task)
+        if not tasks:
+            return 0
+        done, _ = await asyncio.wait(tasks, timeout=timeout)
+        return len(done)
+
+    def _refresh_done(self, job_id: str, task: asyncio.Task):
+        self._in_flight.discard(task)
+        if self._refreshing.get(job_id) is task:
+            del self._refreshing[job_id]
+
+    async def _poll(self, job_id: str):
+        """Refresh one job and schedule its next poll, retrying later if that fails unexpectedly"""
+        try:
+            await self._poll_job(job_id)
+        except Exception as e:
+            # The job has left the heap; without a new entry it would never be polled again
+            failures = self.failures.get(job_id, 0) + 1
+            self.failures[job_id] = failures
+            print(f"ERROR: Polling job {job_id} failed unexpectedly: {e}")
+            if job_id in self.due:
+                self._schedule(job_id, time.time() + self._backoff(failures))
+
+    async def _poll_job(self, job_id: str):
+        job_info = transcription_service.get_job_info(job_id)
+        if job_info is None or job_info["status"] in TERMINAL_STATUSES:
+            if job_info is not None:
+                # Finished on another worker; let local listeners know
+                await transcription_service.publish_status(job_id, self.observed.get(job_id))
+            self.untrack(job_id)
+            return
+
+        jobs = transcription_service.jobs
+        if not await jobs.call(jobs.try_lease, job_id, self.owner, self.lease_duration()):
+            # Another worker polls this job; only relay status changes it makes
+            previous_status = self.observed.get(job_id)
+            self.observed[job_id] = job_info["status"]
+            if previous_status is not None and previous_status != job_info["status"]:
+                await transcription_service.publish_status(job_id, previous_status)
+            if job_id in self.due:
+                self._schedule(job_id, time.time() + settings.POLL_MIN_INTERVAL)
+            return
+        self.observed.pop(job_id, None)
+
+        self.polls += 1
+        try:
+            result = await transcription_service.refresh_job(job_id)
+        except Exception as e:
+            failures = self.failures.get(job_id, 0) + 1
+            self.failures[job_id] = failures
+            print(f"ERROR: Poll {failures} for job {job_id} failed: {e}")
+            if failures >= settings.POLL_MAX_FAILURES and transcription_service.get_job_info(job_id):
+                await transcription_service.mark_failed(job_id, f"Error checking status: {str(e)}")
+                return
+            # Transient failures keep the last known status and retry later
+            if job_id in self.due:
+                self._schedule(job_id, time.time() + self._backoff(failures))
+            return
+
+        self.failures.pop(job_id, None)
+        if result.status not in TERMINAL_STATUSES and job_id in self.due:
+            now = time.time()
+            self._schedule(job_id, now + self.next_interval(job_info, now))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return poller counters"""
+        return {
+            "tracked_jobs": len(self.due),
+            "polls": self.polls,
+            "in_flight": len(self._in_flight),
+        }
+
+# Global instance
+job_poller = JobPoller()
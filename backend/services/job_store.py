@@ -0,0 +1,552 @@
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+from collections import OrderedDict
+from models import TranscriptionStatus, TranscriptionResult
+from config import settings
+from utils.search_index import TranscriptIndex
+from utils.segment_table import SegmentTable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import sqlite3
+import threading
+import time
+
+class JobStore:
+    """Repository of job records, shared by every component that reads job state
+
+    Records are plain dicts. Changes are only guaranteed to be visible to
+    other processes through save() or update(); update() merges fields
+    atomically so concurrent writers do not overwrite each other. Final
+    results, and the segment tables and search indexes of completed ones,
+    live next to the record and are loaded on demand. Resumable upload
+    sessions are kept here too, so any worker can take the next range.
+
+    Code on the event loop writes through call() or call_soon(), so stores
+    that can block on I/O or locks run those writes off the loop.
+    """
+
+    async def call(self, method, *args):
+        """Run a store method and return its result"""
+        return method(*args)
+
+    def call_soon(self, method, *args):
+        """Run a store method without waiting for it"""
+        method(*args)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save(self, job_id: str, record: Dict[str, Any]):
+        raise NotImplementedError
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge fields into an existing record and return it"""
+        raise NotImplementedError
+
+    def delete(self, job_id: str):
+        raise NotImplementedError
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def ids_for_transcript(self, transcript_id: str) -> List[str]:
+        raise NotImplementedError
+
+    def ids_for_content(self, content_hash: str) -> List[str]:
+        """Jobs created for media with this content hash"""
+        raise NotImplementedError
+
+    def ids_by_status(self, statuses: Iterable[TranscriptionStatus]) -> List[str]:
+        raise NotImplementedError
+
+    def expiring_jobs(self) -> List[Tuple[str, float]]:
+        """Job ids with their expiry deadlines"""
+        raise NotImplementedError
+
+    def save_result(self, job_id: str, result: TranscriptionResult,
+                    segments: Optional[SegmentTable] = None,
+                    search_index: Optional[TranscriptIndex] = None):
+        raise NotImplementedError
+
+    def load_result(self, job_id: str) -> Optional[TranscriptionResult]:
+        raise NotImplementedError
+
+    def has_result(self, job_id: str) -> bool:
+        """Whether a final result is stored, without loading it"""
+        return self.load_result(job_id) is not None
+
+    def load_segments(self, job_id: str) -> Optional[SegmentTable]:
+        raise NotImplementedError
+
+    def load_search_index(self, job_id: str) -> Optional[TranscriptIndex]:
+        raise NotImplementedError
+
+    def drop_result(self, job_id: str):
+        """Release a result from memory once the result cache evicts it"""
+
+    def try_lease(self, job_id: str, owner: str, duration: float) -> bool:
+        """Claim the right to poll a job so only one worker polls it at a time"""
+        return True
+
+    def get_content(self, content_hash: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def put_content(self, content_hash: str, transcript_id: str, expires_at: float):
+        raise NotImplementedError
+
+    def delete_content(self, content_hash: str, transcript_id: str):
+        raise NotImplementedError
+
+    def save_upload_session(self, upload_id: str, session: Dict[str, Any]):
+        raise NotImplementedError
+
+    def get_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def add_upload_range(self, upload_id: str, start: int, end: int,
+                         expires_at: float) -> Optional[Dict[str, Any]]:
+        """Record a received byte range of an upload session, extend its deadline and return it"""
+        raise NotImplementedError
+
+    def take_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Remove an upload session and return it; only one caller can take a session"""
+        raise NotImplementedError
+
+    def expiring_upload_sessions(self) -> List[Tuple[str, float]]:
+        """Upload ids with their expiry deadlines"""
+        raise NotImplementedError
+
+
+def merge_range(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Add a [start, end) byte range to sorted, disjoint ranges"""
+    merged = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+class MemoryJobStore(JobStore):
+    """Process-local job store; only valid with a single worker"""
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.transcript_jobs: Dict[str, set] = {}
+        self.content_jobs: Dict[str, set] = {}
+        # Content hash -> (transcript id, expiry time), kept in insertion order
+        self.content_index: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.upload_sessions: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.records.get(job_id)
+
+    def save(self, job_id: str, record: Dict[str, Any]):
+        self._unindex(job_id)
+        self.records[job_id] = record
+        self._index(job_id)
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        record = self.records.get(job_id)
+        if record is not None:
+            self._unindex(job_id)
+            record.update(fields)
+            self._index(job_id)
+        return record
+
+    def delete(self, job_id: str):
+        self._unindex(job_id)
+        self.records.pop(job_id, None)
+
+    def _index(self, job_id: str):
+        record = self.records[job_id]
+        for index, key in ((self.transcript_jobs, record["transcript_id"]),
+                           (self.content_jobs, record.get("content_hash"))):
+            if key is not None:
+                index.setdefault(key, set()).add(job_id)
+
+    def _unindex(self, job_id: str):
+        record = self.records.get(job_id)
+        if record is None:
+            return
+        for index, key in ((self.transcript_jobs, record["transcript_id"]),
+                           (self.content_jobs, record.get("content_hash"))):
+            sharing_jobs = index.get(key) if key is not None else None
+            if sharing_jobs is not None:
+                sharing_jobs.discard(job_id)
+                if not sharing_jobs:
+                    del index[key]
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self.records
+
+    def ids_for_transcript(self, transcript_id: str) -> List[str]:
+        return list(self.transcript_jobs.get(transcript_id, ()))
+
+    def ids_for_content(self, content_hash: str) -> List[str]:
+        return list(self.content_jobs.get(content_hash, ()))
+
+    def ids_by_status(self, statuses: Iterable[TranscriptionStatus]) -> List[str]:
+        statuses = set(statuses)
+        return [job_id for job_id, record in self.records.items() if record["status"] in statuses]
+
+    def expiring_jobs(self) -> List[Tuple[str, float]]:
+        return [
+            (job_id, record["expires_at"]) for job_id, record in self.records.items()
+            if record.get("expires_at")
+        ]
+
+    def save_result(self, job_id: str, result: TranscriptionResult,
+                    segments: Optional[SegmentTable] = None,
+                    search_index: Optional[TranscriptIndex] = None):
+        record = self.records.get(job_id)
+        if record is not None:
+            record["result"] = result
+            record["segments"] = segments
+            record["search_index"] = search_index
+
+    def load_result(self, job_id: str) -> Optional[TranscriptionResult]:
+        record = self.records.get(job_id)
+        return record.get("result") if record else None
+
+    def load_segments(self, job_id: str) -> Optional[SegmentTable]:
+        record = self.records.get(job_id)
+        return record.get("segments") if record else None
+
+    def load_search_index(self, job_id: str) -> Optional[TranscriptIndex]:
+        record = self.records.get(job_id)
+        return record.get("search_index") if record else None
+
+    def drop_result(self, job_id: str):
+        record = self.records.get(job_id)
+        if record is not None:
+            record.pop("result", None)
+            record.pop("segments", None)
+            record.pop("search_index", None)
+
+    def get_content(self, content_hash: str) -> Optional[str]:
+        # Entries share one TTL, so expired ones sit at the front
+        now = time.time()
+        while self.content_index:
+            oldest_hash, (_, expires_at) = next(iter(self.content_index.items()))
+            if expires_at > now:
+                break
+            del self.content_index[oldest_hash]
+
+        entry = self.content_index.get(content_hash)
+        return entry[0] if entry else None
+
+    def put_content(self, content_hash: str, transcript_id: str, expires_at: float):
+        self.content_index.pop(content_hash, None)
+        self.content_index[content_hash] = (transcript_id, expires_at)
+
+    def delete_content(self, content_hash: str, transcript_id: str):
+        entry = self.content_index.get(content_hash)
+        if entry and entry[0] == transcript_id:
+            del self.content_index[content_hash]
+
+    def save_upload_session(self, upload_id: str, session: Dict[str, Any]):
+        self.upload_sessions[upload_id] = session
+
+    def get_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        return self.upload_sessions.get(upload_id)
+
+    def add_upload_range(self, upload_id: str, start: int, end: int,
+                         expires_at: float) -> Optional[Dict[str, Any]]:
+        session = self.upload_sessions.get(upload_id)
+        if session is not None:
+            session["ranges"] = merge_range(session["ranges"], start, end)
+            session["expires_at"] = expires_at
+        return session
+
+    def take_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        return self.upload_sessions.pop(upload_id, None)
+
+    def expiring_upload_sessions(self) -> List[Tuple[str, float]]:
+        return [(upload_id, session["expires_at"]) for upload_id, session in self.upload_sessions.items()]
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a SQLite database (WAL mode) shared by all workers on a host"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            transcript_id TEXT,
+            content_hash TEXT,
+            status TEXT NOT NULL,
+            expires_at REAL,
+            poll_owner TEXT,
+            poll_lease_until REAL,
+            record TEXT NOT NULL,
+            result TEXT,
+            segments BLOB,
+            search_index BLOB
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+        CREATE INDEX IF NOT EXISTS idx_jobs_expires_at ON jobs(expires_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_transcript_id ON jobs(transcript_id);
+        CREATE INDEX IF NOT EXISTS idx_jobs_content_hash ON jobs(content_hash);
+        CREATE TABLE IF NOT EXISTS content_index (
+            content_hash TEXT PRIMARY KEY,
+            transcript_id TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_content_index_expires_at ON content_index(expires_at);
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            upload_id TEXT PRIMARY KEY,
+            expires_at REAL NOT NULL,
+            session TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = self._connect(path)
+        self._conn.executescript(self.SCHEMA)
+        # Reads have their own connection; under WAL they never wait for writers,
+        # so reads on the event loop are not held up by a write waiting for the lock
+        self._read_lock = threading.Lock()
+        self._read_conn = self._connect(path)
+        # Writes can wait up to busy_timeout for other workers, so they run here
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(settings.JOB_STORE_BUSY_TIMEOUT * 1000)}")
+        return conn
+
+    async def call(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args))
+
+    def call_soon(self, method, *args):
+        future = self._executor.submit(method, *args)
+        future.add_done_callback(self._report_failure)
+
+    @staticmethod
+    def _report_failure(future):
+        if future.exception() is not None:
+            print(f"ERROR: Job store write failed: {future.exception()}")
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> str:
+        fields = {k: v for k, v in record.items() if k not in ("result", "segments", "search_index")}
+        fields["status"] = TranscriptionStatus(fields["status"]).value
+        return json.dumps(fields)
+
+    @staticmethod
+    def _decode(data: str) -> Dict[str, Any]:
+        record = json.loads(data)
+        record["status"] = TranscriptionStatus(record["status"])
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT record FROM jobs WHERE job_id = ?", (job_id,))
+        return self._decode(rows[0][0]) if rows else None
+
+    def save(self, job_id: str, record: Dict[str, Any]):
+        self._execute(
+            """
+            INSERT INTO jobs (job_id, transcript_id, content_hash, status, expires_at, record)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job_id) DO UPDATE SET
+                transcript_id = excluded.transcript_id,
+                content_hash = excluded.content_hash,
+                status = excluded.status,
+                expires_at = excluded.expires_at,
+                record = excluded.record
+            """,
+            (job_id, record["transcript_id"], record.get("content_hash"),
+             TranscriptionStatus(record["status"]).value, record.get("expires_at"), self._encode(record))
+        )
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            # Read and write in one write transaction so concurrent workers serialize
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchall()
+                if not rows:
+                    self._conn.execute("COMMIT")
+                    return None
+                record = self._decode(rows[0][0])
+                record.update(fields)
+                self._conn.execute(
+                    "UPDATE jobs SET transcript_id = ?, status = ?, expires_at = ?, record = ? WHERE job_id = ?",
+                    (record["transcript_id"], TranscriptionStatus(record["status"]).value,
+                     record.get("expires_at"), self._encode(record), job_id)
+                )
+                self._conn.execute("COMMIT")
+                return record
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, job_id: str):
+        self._execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def __contains__(self, job_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)))
+
+    def ids_for_transcript(self, transcript_id: str) -> List[str]:
+        rows = self._query("SELECT job_id FROM jobs WHERE transcript_id = ?", (transcript_id,))
+        return [row[0] for row in rows]
+
+    def ids_for_content(self, content_hash: str) -> List[str]:
+        rows = self._query("SELECT job_id FROM jobs WHERE content_hash = ?", (content_hash,))
+        return [row[0] for row in rows]
+
+    def ids_by_status(self, statuses: Iterable[TranscriptionStatus]) -> List[str]:
+        values = [TranscriptionStatus(status).value for status in statuses]
+        placeholders = ",".join("?" for _ in values)
+        rows = self._query(f"SELECT job_id FROM jobs WHERE status IN ({placeholders})", tuple(values))
+        return [row[0] for row in rows]
+
+    def expiring_jobs(self) -> List[Tuple[str, float]]:
+        rows = self._query("SELECT job_id, expires_at FROM jobs WHERE expires_at IS NOT NULL ORDER BY expires_at")
+        return [(row[0], row[1]) for row in rows]
+
+    def save_result(self, job_id: str, result: TranscriptionResult,
+                    segments: Optional[SegmentTable] = None,
+                    search_index: Optional[TranscriptIndex] = None):
+        self._execute(
+            "UPDATE jobs SET result = ?, segments = ?, search_index = ? WHERE job_id = ?",
+            (result.model_dump_json(),
+             segments.to_bytes() if segments is not None else None,
+             search_index.to_bytes() if search_index is not None else None,
+             job_id)
+        )
+
+    def load_result(self, job_id: str) -> Optional[TranscriptionResult]:
+        rows = self._query("SELECT result FROM jobs WHERE job_id = ?", (job_id,))
+        if not rows or rows[0][0] is None:
+            return None
+        return TranscriptionResult.model_validate_json(rows[0][0])
+
+    def has_result(self, job_id: str) -> bool:
+        rows = self._query("SELECT result IS NOT NULL FROM jobs WHERE job_id = ?", (job_id,))
+        return bool(rows and rows[0][0])
+
+    def load_segments(self, job_id: str) -> Optional[SegmentTable]:
+        rows = self._query("SELECT segments FROM jobs WHERE job_id = ?", (job_id,))
+        if not rows or rows[0][0] is None:
+            return None
+        return SegmentTable.from_bytes(rows[0][0])
+
+    def load_search_index(self, job_id: str) -> Optional[TranscriptIndex]:
+        rows = self._query("SELECT search_index FROM jobs WHERE job_id = ?", (job_id,))
+        if not rows or rows[0][0] is None:
+            return None
+        return TranscriptIndex.from_bytes(rows[0][0])
+
+    def try_lease(self, job_id: str, owner: str, duration: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET poll_owner = ?, poll_lease_until = ?
+                WHERE job_id = ?
+                  AND (poll_owner IS NULL OR poll_owner = ? OR poll_lease_until < ?)
+                """,
+                (owner, now + duration, job_id, owner, now)
+            )
+            return cursor.rowcount == 1
+
+    def get_content(self, content_hash: str) -> Optional[str]:
+        rows = self._query(
+            "SELECT transcript_id FROM content_index WHERE content_hash = ? AND expires_at > ?",
+            (content_hash, time.time())
+        )
+        return rows[0][0] if rows else None
+
+    def put_content(self, content_hash: str, transcript_id: str, expires_at: float):
+        with self._lock:
+            self._conn.execute("DELETE FROM content_index WHERE expires_at <= ?", (time.time(),))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_index (content_hash, transcript_id, expires_at) VALUES (?, ?, ?)",
+                (content_hash, transcript_id, expires_at)
+            )
+
+    def delete_content(self, content_hash: str, transcript_id: str):
+        self._execute(
+            "DELETE FROM content_index WHERE content_hash = ? AND transcript_id = ?",
+            (content_hash, transcript_id)
+        )
+
+    def save_upload_session(self, upload_id: str, session: Dict[str, Any]):
+        self._execute(
+            "INSERT OR REPLACE INTO upload_sessions (upload_id, expires_at, session) VALUES (?, ?, ?)",
+            (upload_id, session["expires_at"], json.dumps(session))
+        )
+
+    def get_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT session FROM upload_sessions WHERE upload_id = ?", (upload_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def add_upload_range(self, upload_id: str, start: int, end: int,
+                         expires_at: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            # Ranges written by other workers at the same time must not be lost
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT session FROM upload_sessions WHERE upload_id = ?", (upload_id,)
+                ).fetchall()
+                if not rows:
+                    self._conn.execute("COMMIT")
+                    return None
+                session = json.loads(rows[0][0])
+                session["ranges"] = merge_range(session["ranges"], start, end)
+                session["expires_at"] = expires_at
+                self._conn.execute(
+                    "UPDATE upload_sessions SET expires_at = ?, session = ? WHERE upload_id = ?",
+                    (expires_at, json.dumps(session), upload_id)
+                )
+                self._conn.execute("COMMIT")
+                return session
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def take_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT session FROM upload_sessions WHERE upload_id = ?", (upload_id,)
+                ).fetchall()
+                self._conn.execute("DELETE FROM upload_sessions WHERE upload_id = ?", (upload_id,))
+                self._conn.execute("COMMIT")
+                return json.loads(rows[0][0]) if rows else None
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def expiring_upload_sessions(self) -> List[Tuple[str, float]]:
+        rows = self._query("SELECT upload_id, expires_at FROM upload_sessions ORDER BY expires_at")
+        return [(row[0], row[1]) for row in rows]
+
+
+def create_job_store() -> JobStore:
+    """Build the job store selected by JOB_STORE"""
+    if settings.JOB_STORE == "sqlite":
+        return SQLiteJobStore(settings.JOB_STORE_PATH)
+    return MemoryJobStore()
+
+# Global instance
+job_store = create_job_store()
@@ -1,90 +1,332 @@
 import assemblyai as aai
-from typing import Optional, Dict, Any
-from models import TranscriptionStatus, TranscriptionResult, SubtitleSegment
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+from models import TranscriptionStatus, TranscriptionResult, OutputFormat, SearchHit, SearchResults
 from config import settings
+from services.assemblyai_client import assemblyai_client
+from services.audio_service import audio_service
+from services.job_store import job_store
+from utils.chunking import plan_chunks, stitch_transcripts
+from utils.format_converter import format_converter
+from utils.lru_cache import SizedLRUCache
+from utils.search_index import TranscriptIndex
+from utils.segment_table import SegmentTable
+from utils.segmenter import WordColumns, segment, UTTERANCE_SPLIT_MIN_CHARS, WORD_CUE_MAX_MS
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import httpx
+import os
+import socket
 import time
+import uuid
 
 class TranscriptionService:
     def __init__(self):
-        aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
-        self.client = aai.Transcriber()
-        self.jobs: Dict[str, Dict[str, Any]] = {}
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Job records, in memory or in a store shared by all workers
+        self.jobs = job_store
+        # Identifies this worker in job leases
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._pending_fetches: Dict[str, asyncio.Future] = {}
+        # Serializes the duplicate check and the save of new jobs
+        self._create_lock = asyncio.Lock()
+        # Callbacks invoked with (job_id, result) whenever a job changes status
+        self.status_listeners: List[Callable[[str, TranscriptionResult], None]] = []
+        # AssemblyAI calls this URL when a transcript finishes, replacing status polling
+        self.webhook_url = (
+            f"{settings.WEBHOOK_BASE_URL.rstrip('/')}/webhooks/assemblyai"
+            if settings.WEBHOOK_BASE_URL else None
+        )
+        # Final results of finished jobs with their segment tables and search indexes,
+        # kept in the job record and accounted here
+        self.result_cache = SizedLRUCache(
+            max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+            on_evict=self._on_result_evicted
+        )
     
-    async def start_transcription(self, file_path: str, filename: str) -> str:
-        """Start transcription job with AssemblyAI"""
-        try:
-            print(f"DEBUG: Starting transcription for {filename}")
-            print(f"DEBUG: File path: {file_path}")
-            print(f"DEBUG: API key configured: {bool(settings.ASSEMBLYAI_API_KEY)}")
-
-            # Skip API test and proceed directly to transcription submission
-            print("DEBUG: Proceeding with transcription submission...")
-            # Configure transcription settings for highest accuracy using slam-1 model
-            config = aai.TranscriptionConfig(
-                speech_model=aai.SpeechModel.slam_1,  # Highest accuracy model for English
-                # Note: slam-1 is English-only, so language_detection is not compatible
-                punctuate=True,
-                format_text=True,
-                dual_channel=False,
-                speaker_labels=True,  # Enable speaker diarization for better segmentation
-                auto_highlights=False,
-                content_safety=False,
-                iab_categories=False,
-                custom_spelling=None,
-                disfluencies=False,
-                sentiment_analysis=False,
-                auto_chapters=False,
-                entity_detection=False,
-                speech_threshold=0.5,
-                boost_param="default",
-                redact_pii=False,
-                redact_pii_audio=False,
-                redact_pii_policies=None,
-                redact_pii_sub="***",
-                webhook_url=None,
-                webhook_auth_header_name=None,
-                webhook_auth_header_value=None,
-            )
-            
-            # Submit transcription job with timeout
-            print(f"DEBUG: Submitting transcription job for file: {file_path}")
-            loop = asyncio.get_event_loop()
-            try:
-                transcript = await asyncio.wait_for(
-                    loop.run_in_executor(
-                        self.executor,
-                        lambda: self.client.submit(file_path, config=config)
-                    ),
-                    timeout=120.0  # 2 minute timeout for submission
+    async def create_job(self, file_path: Optional[str], filename: str,
+                   audio_url: Optional[str] = None,
+                   file_size: Optional[int] = None,
+                   content_hash: Optional[str] = None) -> str:
+        """Record a new transcription job
+
+        Media whose content_hash matches a recent upload, or a job still
+        queued or in progress, reuses that transcript. Other jobs stay QUEUED
+        without a transcript until submit_job() sends them to AssemblyAI.
+        """
+        if file_size is None:
+            file_size = os.path.getsize(file_path)
+
+        async with self._create_lock:
+            # Identical media was transcribed recently, so alias its transcript instead of submitting
+            existing_transcript_id = self._lookup_content(content_hash)
+            if existing_transcript_id:
+                print(f"DEBUG: Reusing transcript {existing_transcript_id} for duplicate upload {filename}")
+                return await self._register_job(
+                    str(uuid.uuid4()), existing_transcript_id, filename, file_path, file_size, content_hash
                 )
-                print(f"DEBUG: Transcription job submitted successfully, ID: {transcript.id}")
-            except asyncio.TimeoutError:
-                raise Exception("Timeout while submitting transcription job to AssemblyAI")
-            except Exception as e:
-                print(f"DEBUG: Error submitting transcription job: {str(e)}")
-                raise
-            
-            job_id = transcript.id
-            
-            # Store job info
-            self.jobs[job_id] = {
-                "transcript": transcript,
-                "filename": filename,
-                "file_path": file_path,
-                "started_at": time.time(),
-                "status": TranscriptionStatus.QUEUED
+
+            job_id = str(uuid.uuid4())
+            record = self._new_record(None, filename, file_path, file_size, content_hash, audio_url=audio_url)
+            sibling = self._find_unfinished(content_hash)
+            if sibling is not None:
+                sibling_id, sibling_info = sibling
+                if sibling_info["transcript_id"] is not None:
+                    print(f"DEBUG: Reusing transcript {sibling_info['transcript_id']} of job {sibling_id} for duplicate upload {filename}")
+                    return await self._register_job(
+                        job_id, sibling_info["transcript_id"], filename, file_path, file_size, content_hash
+                    )
+                # Not submitted yet; it hands over its transcript once it is
+                print(f"DEBUG: Duplicate upload {filename} waits for the submission of job {sibling_id}")
+                record["alias_of"] = sibling_id
+            await self.jobs.call(self.jobs.save, job_id, record)
+        return job_id
+
+    def _find_unfinished(self, content_hash: Optional[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """A queued or in-progress job for the same media that submits it itself"""
+        if not content_hash or settings.DEDUP_TTL <= 0:
+            return None
+        for sibling_id in self.jobs.ids_for_content(content_hash):
+            sibling_info = self.jobs.get(sibling_id)
+            if (sibling_info and not sibling_info.get("alias_of")
+                    and sibling_info["status"] in (TranscriptionStatus.QUEUED, TranscriptionStatus.PROCESSING)):
+                return sibling_id, sibling_info
+        return None
+
+    def _aliases(self, job_id: str, job_info: Dict[str, Any]) -> List[str]:
+        """Jobs waiting for this job's submission to get their transcript"""
+        if not job_info.get("content_hash"):
+            return []
+        return [
+            alias_id for alias_id in self.jobs.ids_for_content(job_info["content_hash"])
+            if (self.jobs.get(alias_id) or {}).get("alias_of") == job_id
+        ]
+
+    def needs_submission(self, job_id: str) -> bool:
+        """Whether a job is still waiting to be sent to AssemblyAI"""
+        job_info = self.jobs.get(job_id)
+        return (job_info is not None and job_info["transcript_id"] is None
+                and job_info["status"] == TranscriptionStatus.QUEUED
+                and not job_info.get("alias_of"))
+
+    async def submit_job(self, job_id: str) -> bool:
+        """Send a queued job's media to AssemblyAI; failures mark the job as errored
+
+        Returns False when the job was not this worker's to submit: it is
+        gone, or another worker has claimed it.
+        """
+        job_info = self.jobs.get(job_id)
+        if job_info is None:
+            return False
+        # Jobs restored after a restart can be queued by several workers at once
+        if not await self.jobs.call(self.jobs.try_lease, job_id, self.owner, settings.ADMISSION_SUBMIT_CLAIM):
+            print(f"DEBUG: Job {job_id} is being submitted by another worker")
+            return False
+
+        try:
+            changes = await self._submit_job_media(job_id, job_info)
+        except Exception as e:
+            print(f"ERROR: Submitting job {job_id} failed: {str(e)}")
+            for failed_id in [job_id] + self._aliases(job_id, job_info):
+                if failed_id in self.jobs:
+                    await self.mark_failed(failed_id, f"Failed to start transcription: {str(e)}")
+            return True
+
+        # Chunked jobs have no single upstream transcript to reuse once the job has expired
+        if job_info.get("content_hash") and not changes.get("chunks"):
+            await self._remember_content(job_info["content_hash"], changes["transcript_id"])
+        changes["started_at"] = time.time()
+        # Duplicate uploads that waited for this submission share its transcript
+        for submitted_id in [job_id] + self._aliases(job_id, job_info):
+            if await self.jobs.call(self.jobs.update, submitted_id, dict(changes, alias_of=None)) is None:
+                continue
+            # Announce the submitted job so the job poller starts tracking it
+            self._notify_status_change(submitted_id, None, self._local_result(submitted_id))
+        return True
+
+    async def _submit_job_media(self, job_id: str, job_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Upload and submit a job's media, returning the record fields describing the submission"""
+        file_path = job_info["file_path"]
+        if job_info.get("audio_url") is not None:
+            return {"transcript_id": await self._submit_media(None, job_info["audio_url"])}
+
+        # Long recordings are transcribed as overlapping chunks in parallel
+        if audio_service.can_split(file_path):
+            chunks = await self._submit_chunks(file_path)
+            if chunks:
+                return {"transcript_id": f"chunked-{job_id}", "chunks": chunks}
+
+        # Video uploads are cut down to their audio track first
+        extracted_path = await audio_service.extract_audio(file_path)
+        if extracted_path is None:
+            return {"transcript_id": await self._submit_media(file_path, None)}
+        try:
+            return {
+                "transcript_id": await self._submit_media(extracted_path, None),
+                "upload_size": os.path.getsize(extracted_path),
             }
-            
-            return job_id
-            
+        finally:
+            os.remove(extracted_path)
+
+    async def _submit_chunks(self, file_path: str) -> Optional[List[Dict[str, Any]]]:
+        """Split long media at pauses and submit the chunks concurrently; None for short media"""
+        duration = await audio_service.probe_duration(file_path)
+        if duration is None or duration < settings.CHUNK_MIN_DURATION:
+            return None
+
+        silences = await audio_service.detect_silences(file_path)
+        plan = plan_chunks(duration, silences, settings.CHUNK_DURATION,
+                           settings.CHUNK_OVERLAP, settings.CHUNK_SILENCE_SEARCH_WINDOW)
+        chunk_paths = await audio_service.split(file_path, plan)
+        try:
+            # Chunk transcripts are polled through their job, so they get no webhook
+            transcript_ids = await asyncio.gather(*[
+                self._submit_media(chunk_path, None, use_webhook=False) for chunk_path in chunk_paths
+            ], return_exceptions=True)
+        finally:
+            for chunk_path in chunk_paths:
+                os.remove(chunk_path)
+
+        for transcript_id in transcript_ids:
+            if isinstance(transcript_id, Exception):
+                raise transcript_id
+        print(f"DEBUG: Submitted {file_path} as {len(plan)} chunks")
+        return [dict(chunk, transcript_id=transcript_id) for chunk, transcript_id in zip(plan, transcript_ids)]
+
+    async def _submit_media(self, file_path: Optional[str], audio_url: Optional[str],
+                            use_webhook: bool = True) -> str:
+        """Start transcription with AssemblyAI and return the transcript id
+
+        Media already uploaded to AssemblyAI is submitted by its audio_url,
+        otherwise the file at file_path is uploaded first.
+        """
+        webhook_url = self.webhook_url if use_webhook else None
+        print(f"DEBUG: File path: {file_path}")
+        print(f"DEBUG: API key configured: {bool(settings.ASSEMBLYAI_API_KEY)}")
+
+        # Configure transcription settings for highest accuracy using slam-1 model
+        config = aai.TranscriptionConfig(
+            speech_model=aai.SpeechModel.slam_1,  # Highest accuracy model for English
+            # Note: slam-1 is English-only, so language_detection is not compatible
+            punctuate=True,
+            format_text=True,
+            dual_channel=False,
+            speaker_labels=True,  # Enable speaker diarization for better segmentation
+            auto_highlights=False,
+            content_safety=False,
+            iab_categories=False,
+            custom_spelling=None,
+            disfluencies=False,
+            sentiment_analysis=False,
+            auto_chapters=False,
+            entity_detection=False,
+            speech_threshold=0.5,
+            boost_param="default",
+            redact_pii=False,
+            redact_pii_audio=False,
+            redact_pii_policies=None,
+            redact_pii_sub="***",
+            webhook_url=webhook_url,
+            webhook_auth_header_name=settings.WEBHOOK_AUTH_HEADER_NAME if webhook_url else None,
+            webhook_auth_header_value=settings.WEBHOOK_AUTH_HEADER_VALUE if webhook_url else None,
+        )
+
+        if audio_url is None:
+            print(f"DEBUG: Uploading {file_path} to AssemblyAI")
+            audio_url = await assemblyai_client.upload_file(file_path)
+
+        # Submit transcription job with timeout
+        print(f"DEBUG: Submitting transcription job for: {audio_url}")
+        try:
+            transcript = await asyncio.wait_for(
+                assemblyai_client.submit(audio_url, config),
+                timeout=120.0  # 2 minute timeout for submission
+            )
+            print(f"DEBUG: Transcription job submitted successfully, ID: {transcript.id}")
+        except asyncio.TimeoutError:
+            raise Exception("Timeout while submitting transcription job to AssemblyAI")
         except Exception as e:
-            raise Exception(f"Failed to start transcription: {str(e)}")
-    
-    async def get_subtitle_export(self, job_id: str, format_type: str) -> str:
-        """Get subtitle export in specified format using our improved segmentation"""
+            print(f"DEBUG: Error submitting transcription job: {str(e)}")
+            raise
+
+        return transcript.id
+
+    def _new_record(self, transcript_id: Optional[str], filename: str, file_path: Optional[str],
+                    file_size: int, content_hash: Optional[str] = None,
+                    audio_url: Optional[str] = None) -> Dict[str, Any]:
+        """Initial job record; transcript_id stays None until the job is submitted"""
+        now = time.time()
+        return {
+            "transcript_id": transcript_id,
+            "filename": filename,
+            "file_path": file_path,
+            "file_size": file_size,
+            "content_hash": content_hash,
+            "audio_url": audio_url,
+            "queued_at": now,
+            "started_at": now,
+            "status": TranscriptionStatus.QUEUED
+        }
+
+    async def _register_job(self, job_id: str, transcript_id: str, filename: str,
+                      file_path: Optional[str], file_size: int,
+                      content_hash: Optional[str] = None) -> str:
+        """Store job info for a transcript and announce the new job"""
+        record = self._new_record(transcript_id, filename, file_path, file_size, content_hash)
+        for sibling_id in self.jobs.ids_for_transcript(transcript_id):
+            # Aliases of a chunked job need its chunk list to be polled
+            sibling_info = self.jobs.get(sibling_id)
+            if sibling_info and sibling_info.get("chunks"):
+                record["chunks"] = sibling_info["chunks"]
+                break
+        await self.jobs.call(self.jobs.save, job_id, record)
+
+        # Aliased jobs start out with the result their transcript already has
+        for sibling_id in self.jobs.ids_for_transcript(transcript_id):
+            if sibling_id == job_id:
+                continue
+            sibling_entry = await self._load_entry_async(sibling_id)
+            if sibling_entry is not None:
+                await self._adopt_result(job_id, sibling_entry)
+                return job_id
+
+        # Announce the new job so the job poller starts tracking it
+        self._notify_status_change(job_id, None, self._local_result(job_id))
+        return job_id
+
+    async def _adopt_result(self, job_id: str, sibling_entry: Dict[str, Any]):
+        """Give a job the final result of another job sharing its transcript"""
+        result = sibling_entry["result"].model_copy(update={"job_id": job_id})
+        changes = {"status": result.status, "checked_at": time.time()}
+        if result.status == TranscriptionStatus.COMPLETED:
+            changes["completed_at"] = time.time()
+        else:
+            changes["error"] = result.error
+        await self.jobs.call(self.jobs.update, job_id, changes)
+        # Segment tables and indexes are immutable, so the sibling's can be shared
+        await self._store_result(job_id, result, sibling_entry["segments"], sibling_entry["search_index"])
+        self._notify_status_change(job_id, None, result)
+
+    def _lookup_content(self, content_hash: Optional[str]) -> Optional[str]:
+        """Return the transcript id recorded for identical media, if still fresh"""
+        if not content_hash or settings.DEDUP_TTL <= 0:
+            return None
+        return self.jobs.get_content(content_hash)
+
+    async def _remember_content(self, content_hash: str, transcript_id: str):
+        """Record which transcript was produced for a content hash"""
+        if settings.DEDUP_TTL <= 0:
+            return
+        await self.jobs.call(self.jobs.put_content, content_hash, transcript_id, time.time() + settings.DEDUP_TTL)
+
+    async def _forget_content(self, content_hash: Optional[str], transcript_id: str):
+        """Stop reusing a transcript, e.g. because it failed"""
+        if content_hash:
+            await self.jobs.call(self.jobs.delete_content, content_hash, transcript_id)
+
+    async def get_subtitle_export(self, job_id: str, format_type: str) -> Iterator[bytes]:
+        """Get subtitle export in specified format using our improved segmentation
+
+        The export is rendered lazily, as UTF-8 encoded chunks, while the
+        returned iterator is consumed.
+        """
         print(f"DEBUG: get_subtitle_export called with job_id={job_id}, format_type={format_type}")
 
         if job_id not in self.jobs:
@@ -96,253 +338,336 @@ class TranscriptionService:
         if result.status != TranscriptionStatus.COMPLETED:
             raise Exception(f"Transcription not completed. Status: {result.status}")
 
-        if not result.segments:
+        entry = await self._load_entry_async(job_id)
+        segments = entry["segments"] if entry else None
+        if not segments:
             raise Exception("No segments available for export")
 
         try:
-            from utils.format_converter import format_converter
-
-            if format_type.lower() == 'srt':
-                print("DEBUG: Exporting SRT using improved segmentation")
-                subtitle_content = format_converter.to_srt(result.segments)
-            elif format_type.lower() == 'vtt':
-                print("DEBUG: Exporting VTT using improved segmentation")
-                subtitle_content = format_converter.to_vtt(result.segments)
-            else:
-                print("DEBUG: Exporting TXT using improved segmentation")
-                subtitle_content = format_converter.to_txt(result.text, result.segments)
-
-            print(f"DEBUG: Export successful, content length: {len(subtitle_content)}")
-            return subtitle_content
-
-        except Exception as e:
-            print(f"DEBUG: Export failed with error: {str(e)}")
-            raise Exception(f"Error exporting subtitles: {str(e)}")
-
-    def _create_segments_from_utterances(self, utterances) -> list:
-        """Create segments from AssemblyAI utterances with speaker-based segmentation"""
-        segments = []
-
-        for utterance in utterances:
-            # Convert utterance to segments, splitting on sentence boundaries if needed
-            utterance_segments = self._split_utterance_by_sentences(
-                text=utterance.text,
-                start_time=utterance.start / 1000.0,  # Convert to seconds
-                end_time=utterance.end / 1000.0,
-                speaker=utterance.speaker,
-                words=utterance.words if hasattr(utterance, 'words') else None
-            )
-            segments.extend(utterance_segments)
-
-        return segments
-
-    def _create_segments_from_words(self, words) -> list:
-        """Fallback method to create segments from words when utterances are not available"""
-        segments = []
-        current_segment = []
-        segment_start = None
-        current_speaker = None
-
-        for word in words:
-            word_speaker = getattr(word, 'speaker', None)
-
-            if segment_start is None:
-                segment_start = word.start / 1000.0
-                current_speaker = word_speaker
-
-            # Check if we should start a new segment
-            should_split = False
-
-            # Split on speaker change
-            if word_speaker and current_speaker and word_speaker != current_speaker:
-                should_split = True
-
-            # Split on sentence boundaries
-            elif word.text.endswith(('.', '!', '?')):
-                should_split = True
-
-            # Split if segment is too long (max 5 seconds)
-            elif (word.end / 1000.0 - segment_start) > 5.0:
-                should_split = True
-
-            current_segment.append(word.text)
-
-            if should_split:
-                segments.append(SubtitleSegment(
-                    start=segment_start,
-                    end=word.end / 1000.0,
-                    text=' '.join(current_segment).strip(),
-                    speaker=current_speaker
-                ))
-                current_segment = []
-                segment_start = None
-                current_speaker = word_speaker
-
-        # Add remaining words as final segment
-        if current_segment and segment_start is not None:
-            last_word = words[-1]
-            segments.append(SubtitleSegment(
-                start=segment_start,
-                end=last_word.end / 1000.0,
-                text=' '.join(current_segment).strip(),
-                speaker=current_speaker
-            ))
+            output_format = OutputFormat(format_type.lower())
+        except ValueError:
+            output_format = OutputFormat.TXT
+        print(f"DEBUG: Exporting {output_format.value.upper()} using improved segmentation ({len(segments)} segments)")
+        return format_converter.render(output_format, result.text, segments)
+
+    def _create_segments(self, transcript) -> Tuple[SegmentTable, TranscriptIndex]:
+        """Segment a completed transcript into subtitle cues aligned to its word timestamps
+
+        The words are indexed for search in the same go.
+        """
+        if transcript.utterances:
+            # Speaker-based segmentation, split further at sentence ends
+            columns = WordColumns.from_utterances(transcript.utterances)
+            segments = segment(columns, min_split_chars=UTTERANCE_SPLIT_MIN_CHARS)
+        else:
+            # Fallback to word-based segmentation if no utterances available
+            columns = WordColumns.from_words(transcript.words or ())
+            segments = segment(columns, max_cue_ms=WORD_CUE_MAX_MS)
+        return segments, TranscriptIndex.build(columns.texts, columns.starts, segments.starts)
+
+    async def get_segments(self, job_id: str) -> Optional[SegmentTable]:
+        """Segment table of a completed job, or None while it is unfinished"""
+        result = await self.get_transcription_status(job_id)
+        if result.status != TranscriptionStatus.COMPLETED:
+            return None
+        entry = await self._load_entry_async(job_id)
+        return entry["segments"] if entry else None
 
-        return segments
-
-    def _split_utterance_by_sentences(self, text: str, start_time: float, end_time: float,
-                                     speaker: str, words=None) -> list:
-        """Split an utterance into segments based on sentence boundaries"""
-        import re
-
-        segments = []
-
-        # If the utterance is short or doesn't contain sentence endings, return as single segment
-        if len(text) < 100 or not re.search(r'[.!?]', text):
-            return [SubtitleSegment(
-                start=start_time,
-                end=end_time,
-                text=text.strip(),
-                speaker=speaker
-            )]
-
-        # Split text into sentences while preserving punctuation
-        sentence_pattern = r'([.!?]+)'
-        parts = re.split(sentence_pattern, text)
-
-        sentences = []
-        current_sentence = ""
-
-        for i, part in enumerate(parts):
-            if re.match(sentence_pattern, part):
-                # This is punctuation, add it to current sentence
-                current_sentence += part
-                sentences.append(current_sentence.strip())
-                current_sentence = ""
-            else:
-                # This is text
-                current_sentence += part
-
-        # Add any remaining text as the last sentence
-        if current_sentence.strip():
-            sentences.append(current_sentence.strip())
-
-        # Remove empty sentences
-        sentences = [s for s in sentences if s.strip()]
-
-        if len(sentences) <= 1:
-            # If we only have one sentence, return as single segment
-            return [SubtitleSegment(
-                start=start_time,
-                end=end_time,
-                text=text.strip(),
-                speaker=speaker
-            )]
-
-        # Calculate timing for each sentence based on character count
-        total_chars = len(text)
-        current_time = start_time
-        duration = end_time - start_time
-
-        for i, sentence in enumerate(sentences):
-            sentence_chars = len(sentence)
-            sentence_duration = (sentence_chars / total_chars) * duration
-
-            # Ensure minimum segment duration of 0.5 seconds
-            if sentence_duration < 0.5:
-                sentence_duration = 0.5
-
-            segment_end = min(current_time + sentence_duration, end_time)
-
-            # For the last sentence, make sure it ends at the utterance end time
-            if i == len(sentences) - 1:
-                segment_end = end_time
-
-            segments.append(SubtitleSegment(
-                start=current_time,
-                end=segment_end,
-                text=sentence.strip(),
-                speaker=speaker
+    async def search(self, job_id: str, query: str, limit: int) -> Optional[SearchResults]:
+        """Find a phrase in a completed job's word index; None while the job is unfinished"""
+        result = await self.get_transcription_status(job_id)
+        if result.status != TranscriptionStatus.COMPLETED:
+            return None
+        entry = await self._load_entry_async(job_id)
+        search_index, segments = entry["search_index"], entry["segments"]
+
+        positions = search_index.search(query)
+        hits = []
+        for position in positions[:limit]:
+            segment_index = search_index.segments[position]
+            hits.append(SearchHit(
+                start=search_index.starts[position] / 1000.0,
+                segment_index=segment_index,
+                segment=segments.to_segments(segment_index, segment_index + 1)[0]
             ))
+        return SearchResults(job_id=job_id, query=query, total_hits=len(positions), hits=hits)
 
-            current_time = segment_end
-
-        return segments
+    async def segment_count(self, job_id: str) -> int:
+        """Number of segments of a completed job whose result is at hand"""
+        entry = await self._load_entry_async(job_id)
+        return len(entry["segments"]) if entry and entry["segments"] is not None else 0
 
     async def get_transcription_status(self, job_id: str) -> TranscriptionResult:
         """Get current status of transcription job"""
-        if job_id not in self.jobs:
+        job_info = self.jobs.get(job_id)
+        if job_info is None:
             raise Exception("Job not found")
-        
-        job_info = self.jobs[job_id]
-        transcript = job_info["transcript"]
-        
-        try:
-            # Poll transcript status with timeout
-            loop = asyncio.get_event_loop()
-            try:
-                current_transcript = await asyncio.wait_for(
-                    loop.run_in_executor(
-                        self.executor,
-                        lambda: aai.Transcript.get_by_id(transcript.id)
-                    ),
-                    timeout=30.0  # 30 second timeout
-                )
-            except asyncio.TimeoutError:
-                raise Exception("Timeout while checking transcription status")
-
-            # Update job status - check for the correct status enum values
-            if current_transcript.status == "completed":
-                job_info["status"] = TranscriptionStatus.COMPLETED
-                job_info["completed_at"] = time.time()
-
-                # Convert segments to our format using improved segmentation logic
-                segments = []
 
-                if current_transcript.utterances:
-                    # Use utterances for speaker-based segmentation
-                    segments = self._create_segments_from_utterances(current_transcript.utterances)
-                elif current_transcript.words:
-                    # Fallback to word-based segmentation if no utterances available
-                    segments = self._create_segments_from_words(current_transcript.words)
+        # Finished jobs never change, so serve them without an upstream call
+        if job_info["status"] in (TranscriptionStatus.COMPLETED, TranscriptionStatus.ERROR):
+            entry = await self._load_entry_async(job_id)
+            if entry is not None:
+                return entry["result"]
 
-                return TranscriptionResult(
-                    job_id=job_id,
-                    status=TranscriptionStatus.COMPLETED,
-                    text=current_transcript.text,
-                    segments=segments,
-                    confidence=current_transcript.confidence,
-                    audio_duration=current_transcript.audio_duration / 1000.0 if current_transcript.audio_duration else None
-                )
-
-            elif current_transcript.status == "error":
-                job_info["status"] = TranscriptionStatus.ERROR
+        # A completed job whose result was evicted is fetched again once
+        if job_info["status"] == TranscriptionStatus.COMPLETED:
+            try:
+                return await self.refresh_job(job_id)
+            except Exception as e:
                 return TranscriptionResult(
                     job_id=job_id,
                     status=TranscriptionStatus.ERROR,
-                    error=current_transcript.error or "Unknown error occurred"
-                )
-
-            else:
-                # Still processing (queued, processing, etc.)
-                job_info["status"] = TranscriptionStatus.PROCESSING
-                return TranscriptionResult(
-                    job_id=job_id,
-                    status=TranscriptionStatus.PROCESSING
+                    error=f"Error checking status: {str(e)}"
                 )
 
+        # Unfinished jobs are kept current by the job poller (or webhooks)
+        return self._local_result(job_id)
+
+    async def _load_entry_async(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's result entry from the result cache, or read and deserialized in a worker thread"""
+        entry = self.result_cache.get(job_id)
+        if entry is not None:
+            return entry
+        loop = asyncio.get_event_loop()
+        return self._cache_entry(job_id, await loop.run_in_executor(None, self._read_entry, job_id))
+
+    def _cache_entry(self, job_id: str, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is not None:
+            self.result_cache.put(job_id, entry, self._estimate_entry_size(entry))
+        return entry
+
+    def _read_entry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a stored result with its segment table and search index; may run in a worker thread"""
+        result = self.jobs.load_result(job_id)
+        if result is None:
+            return None
+        segments = self.jobs.load_segments(job_id)
+        search_index = self.jobs.load_search_index(job_id)
+        return {"result": result, "segments": segments, "search_index": search_index}
+
+    def _local_result(self, job_id: str) -> TranscriptionResult:
+        """Build a result from locally tracked job state"""
+        job_info = self.jobs.get(job_id)
+        return TranscriptionResult(
+            job_id=job_id,
+            status=job_info["status"],
+            error=job_info.get("error")
+        )
+
+    async def handle_webhook(self, transcript_id: str, status: str) -> int:
+        """Apply an AssemblyAI completion callback, fetching the transcript once"""
+        if status not in ("completed", "error"):
+            return 0
+
+        pending_jobs = [
+            job_id for job_id in self.jobs.ids_for_transcript(transcript_id)
+            if not self._is_finished(job_id)
+        ]
+        if not pending_jobs:
+            return 0
+
+        print(f"DEBUG: Webhook received for transcript {transcript_id} with status {status}")
+        try:
+            current_transcript = await self._fetch_transcript(transcript_id)
         except Exception as e:
-            job_info["status"] = TranscriptionStatus.ERROR
-            return TranscriptionResult(
+            # Leave the jobs as they are so the fallback poll can pick them up
+            print(f"ERROR: Failed to fetch transcript {transcript_id} after webhook: {e}")
+            return 0
+
+        segmented = await self._segment_transcript(current_transcript)
+        for job_id in pending_jobs:
+            if job_id in self.jobs:
+                await self._apply_transcript(job_id, current_transcript, segmented)
+        return len(pending_jobs)
+
+    def _is_finished(self, job_id: str) -> bool:
+        """Whether a job has a stored final result"""
+        job_info = self.jobs.get(job_id)
+        return job_info is not None and job_info["status"] in (
+            TranscriptionStatus.COMPLETED, TranscriptionStatus.ERROR
+        ) and (job_id in self.result_cache or self.jobs.has_result(job_id))
+
+    async def refresh_job(self, job_id: str) -> TranscriptionResult:
+        """Fetch the job's transcript from AssemblyAI and update the job"""
+        job_info = self.jobs.get(job_id)
+        if job_info is None:
+            raise Exception("Job not found")
+        transcript_id = job_info["transcript_id"]
+        current_transcript = await self._fetch_job_transcript(job_info)
+        segmented = await self._segment_transcript(current_transcript)
+        if job_id not in self.jobs:
+            raise Exception("Job not found")
+
+        # Unfinished jobs aliased to the same transcript share the fetched state
+        for sibling_id in self.jobs.ids_for_transcript(transcript_id):
+            if sibling_id != job_id and not self._is_finished(sibling_id):
+                await self._apply_transcript(sibling_id, current_transcript, segmented)
+        return await self._apply_transcript(job_id, current_transcript, segmented)
+
+    async def mark_failed(self, job_id: str, error: str) -> TranscriptionResult:
+        """Give up on a job that could not be checked"""
+        previous_status = self.jobs.get(job_id)["status"]
+        await self.jobs.call(self.jobs.update, job_id, {"status": TranscriptionStatus.ERROR, "error": error})
+        result = TranscriptionResult(
+            job_id=job_id,
+            status=TranscriptionStatus.ERROR,
+            error=error
+        )
+        self._notify_status_change(job_id, previous_status, result)
+        return result
+
+    async def _fetch_job_transcript(self, job_info: Dict[str, Any]):
+        """Get a job's transcript, stitching chunked jobs together from their pieces"""
+        chunks = job_info.get("chunks")
+        if not chunks:
+            return await self._fetch_transcript(job_info["transcript_id"])
+        transcripts = await asyncio.gather(*[self._fetch_transcript(chunk["transcript_id"]) for chunk in chunks])
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, stitch_transcripts, chunks, transcripts)
+
+    async def _fetch_transcript(self, transcript_id: str):
+        """Get a transcript from AssemblyAI, sharing one request between concurrent callers"""
+        pending = self._pending_fetches.get(transcript_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._get_transcript(transcript_id))
+            self._pending_fetches[transcript_id] = pending
+            pending.add_done_callback(lambda _: self._pending_fetches.pop(transcript_id, None))
+        return await asyncio.shield(pending)
+
+    async def _get_transcript(self, transcript_id: str):
+        """Poll transcript status with timeout"""
+        try:
+            return await asyncio.wait_for(
+                assemblyai_client.get_transcript(transcript_id),
+                timeout=30.0  # 30 second timeout
+            )
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            raise Exception("Timeout while checking transcription status")
+
+    async def _segment_transcript(self, transcript) -> Optional[Tuple[SegmentTable, TranscriptIndex]]:
+        """Segments and search index of a completed transcript, built in a worker thread"""
+        if transcript.status != "completed":
+            return None
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._create_segments, transcript)
+
+    async def _apply_transcript(self, job_id: str, current_transcript,
+                          segmented: Optional[Tuple[SegmentTable, TranscriptIndex]]) -> TranscriptionResult:
+        """Update a job from an AssemblyAI transcript and build its result
+
+        segmented holds the segments and search index of a completed
+        transcript, from _segment_transcript.
+        """
+        job_info = self.jobs.get(job_id)
+        previous_status = job_info["status"]
+        checked_at = time.time()
+
+        # Update job status - check for the correct status enum values
+        if current_transcript.status == "completed":
+            await self.jobs.call(self.jobs.update, job_id, {
+                "status": TranscriptionStatus.COMPLETED,
+                "checked_at": checked_at,
+                "completed_at": checked_at
+            })
+
+            # Converted to our format by the improved segmentation logic
+            segments, search_index = segmented
+
+            # Segments stay in the table; responses attach the rows they return
+            result = TranscriptionResult(
+                job_id=job_id,
+                status=TranscriptionStatus.COMPLETED,
+                text=current_transcript.text,
+                confidence=current_transcript.confidence,
+                audio_duration=current_transcript.audio_duration / 1000.0 if current_transcript.audio_duration else None
+            )
+            await self._store_result(job_id, result, segments, search_index)
+            self._notify_status_change(job_id, previous_status, result)
+            return result
+
+        elif current_transcript.status == "error":
+            await self.jobs.call(self.jobs.update, job_id, {
+                "status": TranscriptionStatus.ERROR,
+                "checked_at": checked_at,
+                "error": current_transcript.error or "Unknown error occurred"
+            })
+            await self._forget_content(job_info.get("content_hash"), job_info["transcript_id"])
+            result = TranscriptionResult(
                 job_id=job_id,
                 status=TranscriptionStatus.ERROR,
-                error=f"Error checking status: {str(e)}"
+                error=current_transcript.error or "Unknown error occurred"
             )
-    
+            await self._store_result(job_id, result)
+            self._notify_status_change(job_id, previous_status, result)
+            return result
+
+        else:
+            # Still processing (queued, processing, etc.)
+            await self.jobs.call(self.jobs.update, job_id, {
+                "status": TranscriptionStatus.PROCESSING,
+                "checked_at": checked_at
+            })
+            result = TranscriptionResult(
+                job_id=job_id,
+                status=TranscriptionStatus.PROCESSING
+            )
+            self._notify_status_change(job_id, previous_status, result)
+            return result
+
+    def _notify_status_change(self, job_id: str, previous_status: Optional[TranscriptionStatus],
+                              result: TranscriptionResult):
+        """Tell status listeners about a job that moved to a new status"""
+        if result.status == previous_status:
+            return
+
+        for listener in self.status_listeners:
+            try:
+                listener(job_id, result)
+            except Exception as e:
+                print(f"ERROR: Status listener failed for job {job_id}: {e}")
+
+    async def _store_result(self, job_id: str, result: TranscriptionResult,
+                      segments: Optional[SegmentTable] = None,
+                      search_index: Optional[TranscriptIndex] = None):
+        """Keep the final result of a finished job, its segments and search index in its record"""
+        if job_id not in self.jobs:
+            return
+
+        await self.jobs.call(self.jobs.save_result, job_id, result, segments, search_index)
+        entry = {"result": result, "segments": segments, "search_index": search_index}
+        self.result_cache.put(job_id, entry, self._estimate_entry_size(entry))
+
+    def _on_result_evicted(self, job_id: str, entry: Dict[str, Any]):
+        """Drop an evicted result from memory; persistent stores keep it on disk"""
+        self.jobs.drop_result(job_id)
+
+    @staticmethod
+    def _estimate_entry_size(entry: Dict[str, Any]) -> int:
+        """Approximate memory footprint of a result with its segment table and index in bytes"""
+        result = entry["result"]
+        size = 512 + len(result.text or "") + len(result.error or "")
+        for part in (entry["segments"], entry["search_index"]):
+            if part is not None:
+                size += part.nbytes
+        return size
+
     def cleanup_job(self, job_id: str):
         """Clean up job data"""
-        if job_id in self.jobs:
-            del self.jobs[job_id]
+        self.result_cache.pop(job_id)
+        self.jobs.call_soon(self.jobs.delete, job_id)
+
+    def set_job_expiry(self, job_id: str, expires_at: float):
+        """Record when a job is due to be cleaned up"""
+        self.jobs.call_soon(self.jobs.update, job_id, {"expires_at": expires_at})
+
+    async def publish_status(self, job_id: str, previous_status: Optional[TranscriptionStatus]):
+        """Announce a status change made by another worker to local listeners"""
+        job_info = self.jobs.get(job_id)
+        if job_info is None:
+            return
+        entry = await self._load_entry_async(job_id)
+        result = entry["result"] if entry else self._local_result(job_id)
+        self._notify_status_change(job_id, previous_status, result)
     
     def get_job_info(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job information"""
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the async AssemblyAI client against a fake AssemblyAI API server
+"""
+
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeAssemblyAI(BaseHTTPRequestHandler):
+    """Minimal AssemblyAI API whose transcript fetches fail a set number of times first"""
+    protocol_version = "HTTP/1.1"
+    failures_left = 0
+    connections = set()
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            data = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return data
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path == "/v2/upload":
+            self._reply(200, {"upload_url": f"https://cdn.example/{len(body)}"})
+        elif self.headers.get("authorization") != "test-key":
+            self._reply(401, {"error": "Authentication error, API token missing/invalid"})
+        else:
+            request = json.loads(body)
+            self._reply(200, {"id": "transcript-1", "status": "queued", "audio_url": request["audio_url"]})
+
+    def do_GET(self):
+        FakeAssemblyAI.connections.add(self.client_address)
+        if FakeAssemblyAI.failures_left > 0:
+            FakeAssemblyAI.failures_left -= 1
+            self._reply(500, {"error": "Service temporarily unavailable"})
+            return
+        self._reply(200, {
+            "id": self.path.rsplit("/", 1)[-1],
+            "status": "completed",
+            "audio_url": "https://cdn.example/audio.mp3",
+            "text": "Retried successfully.",
+            "confidence": 0.9,
+            "audio_duration": 1,
+            "words": [{"text": "Retried", "start": 0, "end": 400, "confidence": 0.9, "speaker": "A"},
+                      {"text": "successfully.", "start": 500, "end": 900, "confidence": 0.9, "speaker": "A"}],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAssemblyAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def test_client_calls():
+    """Upload, submit and fetch through the client, including a failing fetch"""
+    import assemblyai as aai
+    from services.assemblyai_client import assemblyai_client
+
+    print("=== Testing AssemblyAI Client ===")
+
+    async def chunks():
+        for _ in range(4):
+            yield b"x" * 1000
+
+    upload_url = await assemblyai_client.upload(chunks())
+    print(f"\nUpload URL: {upload_url}")
+    if upload_url != "https://cdn.example/4000":
+        print("❌ Streamed upload did not arrive in full")
+        return False
+    print("✅ Streamed upload arrived in full")
+
+    transcript = await assemblyai_client.submit(upload_url, aai.TranscriptionConfig(punctuate=True))
+    if transcript.id != "transcript-1" or transcript.status != aai.TranscriptStatus.queued:
+        print(f"❌ Unexpected submit response: {transcript}")
+        return False
+    print("✅ Submit response parsed into the SDK's transcript type")
+
+    FakeAssemblyAI.failures_left = 1
+    try:
+        await assemblyai_client.get_transcript("transcript-1")
+        print("❌ Server error was not raised")
+        return False
+    except aai.types.TranscriptError as e:
+        if e.status_code != 500 or "temporarily unavailable" not in str(e):
+            print(f"❌ Error lost the status or detail: {e.status_code} {e}")
+            return False
+        print(f"✅ Server error raised with its status and detail: {e}")
+
+    transcript = await assemblyai_client.get_transcript("transcript-1")
+    if transcript.status != aai.TranscriptStatus.completed or len(transcript.words) != 2:
+        print(f"❌ Retried fetch returned {transcript.status}")
+        return False
+    print("✅ Retried fetch succeeded")
+
+    FakeAssemblyAI.connections.clear()
+    for _ in range(5):
+        await assemblyai_client.get_transcript("transcript-1")
+    print(f"Connections used for 5 sequential fetches: {len(FakeAssemblyAI.connections)}")
+    if len(FakeAssemblyAI.connections) != 1:
+        print("❌ Keep-alive connection was not reused")
+        return False
+    print("✅ Keep-alive connection reused")
+    return True
+
+async def test_poller_retry():
+    """A job whose status checks fail transiently keeps its status and completes on retry"""
+    from config import settings
+    from models import TranscriptionStatus
+    from services.job_poller import job_poller
+    from services.transcription_service import transcription_service
+
+    print("\n=== Testing Poll Retry After Upstream Errors ===")
+
+    job_id = await transcription_service.create_job(
+        None, "retry.mp3", audio_url="https://cdn.example/audio.mp3", file_size=1000
+    )
+    await transcription_service.submit_job(job_id)
+
+    FakeAssemblyAI.failures_left = settings.POLL_MAX_FAILURES - 1
+    for attempt in range(1, settings.POLL_MAX_FAILURES):
+        await job_poller._poll(job_id)
+        status = transcription_service.get_job_info(job_id)["status"]
+        print(f"Status after failed poll {attempt}: {status.value}")
+        if status == TranscriptionStatus.ERROR:
+            print("❌ Job failed before POLL_MAX_FAILURES polls")
+            return False
+    print("✅ Transient failures kept the last known status")
+
+    await job_poller._poll(job_id)
+    status = transcription_service.get_job_info(job_id)["status"]
+    print(f"Status after successful poll: {status.value}")
+    if status != TranscriptionStatus.COMPLETED or job_id in job_poller.failures:
+        print("❌ Job did not recover on retry")
+        return False
+    print("✅ Job completed on retry")
+    return True
+
+async def run_tests():
+    from services.assemblyai_client import assemblyai_client
+    try:
+        return await test_client_calls(), await test_poller_retry()
+    finally:
+        await assemblyai_client.close()
+
+def main():
+    """Main test function"""
+    server = start_fake_server()
+    os.environ["ASSEMBLYAI_API_KEY"] = "test-key"
+    os.environ["ASSEMBLYAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["WEBHOOK_BASE_URL"] = ""
+    os.environ["JOB_STORE"] = "memory"
+
+    try:
+        client_ok, retry_ok = asyncio.run(run_tests())
+    finally:
+        server.shutdown()
+
+    print(f"\n=== Test Results ===")
+    print(f"Client calls test: {'PASS' if client_ok else 'FAIL'}")
+    print(f"Poll retry test: {'PASS' if retry_ok else 'FAIL'}")
+
+    if not (client_ok and retry_ok):
+        print(f"\n❌ Some tests failed. Please check the implementation.")
+        raise SystemExit(1)
+    print(f"\n🎉 All tests passed! The async client handles errors and retries against the fake API.")
+
+if __name__ == "__main__":
+    main()
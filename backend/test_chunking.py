@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script to verify chunk planning and the stitching of chunk transcripts back onto the source timeline
+"""
+
+from types import SimpleNamespace
+
+import assemblyai as aai
+
+from utils.chunking import parse_silences, plan_chunks, stitch_transcripts
+
+def make_transcript(words, audio_duration, status="completed", error=None):
+    """Stub chunk transcript: (text, start ms, end ms, speaker) words, one utterance per speaker turn"""
+    word_objects = [
+        aai.types.Word(text=text, start=start, end=end, confidence=0.9, speaker=speaker)
+        for text, start, end, speaker in words
+    ]
+    turns = []
+    for word in word_objects:
+        if turns and turns[-1][-1].speaker == word.speaker:
+            turns[-1].append(word)
+        else:
+            turns.append([word])
+    utterances = [
+        aai.types.Utterance(
+            text=" ".join(word.text for word in turn), start=turn[0].start, end=turn[-1].end,
+            confidence=0.9, speaker=turn[0].speaker, words=turn
+        )
+        for turn in turns
+    ]
+    return SimpleNamespace(status=status, error=error, words=word_objects,
+                           utterances=utterances, audio_duration=audio_duration)
+
+def test_plan_chunks():
+    """Cuts land in silences near the target and the owned ranges tile the media"""
+    print("=== Testing Chunk Planning ===")
+
+    silences = parse_silences(
+        "[silencedetect @ 0x1] silence_start: 95.5\n"
+        "[silencedetect @ 0x1] silence_end: 96.5 | silence_duration: 1\n"
+        "[silencedetect @ 0x1] silence_start: 205\n"
+        "[silencedetect @ 0x1] silence_end: 207 | silence_duration: 2\n"
+    )
+    print(f"\nParsed silences: {silences}")
+    if silences != [(95.5, 96.5), (205.0, 207.0)]:
+        print("❌ Silences parsed incorrectly")
+        return False
+    print("✅ Silences parsed from ffmpeg output")
+
+    chunks = plan_chunks(300, silences, chunk_seconds=100, overlap=5, search_window=10)
+    print(f"Planned chunks: {[(c['keep_start'], c['keep_end']) for c in chunks]}")
+    cuts = [chunk["keep_start"] for chunk in chunks[1:]]
+    if cuts != [96.0, 206.0]:
+        print("❌ Cuts are not in the middle of the nearest silences")
+        return False
+    print("✅ Cuts placed in the middle of the nearest silences")
+
+    tiled = all(a["keep_end"] == b["keep_start"] for a, b in zip(chunks, chunks[1:]))
+    if not tiled or chunks[0]["keep_start"] != 0 or chunks[-1]["keep_end"] != 300:
+        print("❌ Owned ranges do not tile the whole duration")
+        return False
+    if chunks[0]["start"] != 0 or chunks[1]["start"] != 91 or chunks[1]["end"] != 211 or chunks[-1]["end"] != 300:
+        print("❌ Overlap not applied within the media bounds")
+        return False
+    print("✅ Owned ranges tile the media and overlaps stay within its bounds")
+    return True
+
+def test_stitch_offsets():
+    """Words are shifted by their chunk's start and overlap words are kept once"""
+    print("\n=== Testing Chunk Stitching Offsets ===")
+
+    # Chunk 1 covers 0-15s and owns 0-10s; chunk 2 covers 5-20s and owns 10-20s
+    chunks = [
+        {"start": 0.0, "end": 15.0, "keep_start": 0.0, "keep_end": 10.0},
+        {"start": 5.0, "end": 20.0, "keep_start": 10.0, "keep_end": 20.0},
+    ]
+    first = make_transcript([
+        ("Good", 1000, 1400, "A"), ("morning", 1500, 2000, "A"),
+        ("welcome", 9000, 9600, "B"), ("back", 10500, 11000, "B"),  # "back" is owned by chunk 2
+    ], audio_duration=15)
+    second = make_transcript([
+        ("welcome", 4000, 4600, "A"), ("back", 5500, 6000, "A"),    # 9.0s and 10.5s on the source
+        ("everyone", 7000, 7800, "A"),
+    ], audio_duration=15)
+
+    stitched = stitch_transcripts(chunks, [first, second])
+    words = [(word.text, word.start, word.end, word.speaker) for word in stitched.words]
+    print(f"\nStitched words: {words}")
+    expected = [
+        ("Good", 1000, 1400, "1A"), ("morning", 1500, 2000, "1A"), ("welcome", 9000, 9600, "1B"),
+        ("back", 10500, 11000, "2A"), ("everyone", 12000, 12800, "2A"),
+    ]
+    if words != expected:
+        print(f"❌ Expected {expected}")
+        return False
+    print("✅ Words shifted onto the source timeline, each overlap word kept once")
+    print("✅ Speaker labels namespaced per chunk")
+
+    utterances = [(u.text, u.start, u.end, u.speaker) for u in stitched.utterances]
+    print(f"Stitched utterances: {utterances}")
+    if utterances != [("Good morning", 1000, 2000, "1A"), ("welcome", 9000, 9600, "1B"),
+                      ("back everyone", 10500, 12800, "2A")]:
+        print("❌ Utterances not trimmed to their owned words")
+        return False
+    print("✅ Utterances trimmed to their owned words")
+
+    if stitched.text != "Good morning welcome back everyone" or stitched.audio_duration != 20:
+        print(f"❌ Unexpected text or duration: {stitched.text!r} {stitched.audio_duration}")
+        return False
+    print("✅ Text and audio duration cover the whole source")
+
+    single = stitch_transcripts(chunks[:1], [first])
+    if any(word.speaker not in ("A", "B") for word in single.words):
+        print("❌ A single chunk should keep its speaker labels")
+        return False
+    print("✅ Single chunk keeps its speaker labels")
+
+    failed = stitch_transcripts(chunks, [first, make_transcript([], 0, status="error", error="Bad audio")])
+    if failed.status != "error" or failed.error != "Chunk 2 failed: Bad audio":
+        print(f"❌ Chunk failure not reported: {failed}")
+        return False
+    print("✅ A failed chunk fails the whole transcript")
+    return True
+
+def main():
+    """Main test function"""
+    planning_ok = test_plan_chunks()
+    stitching_ok = test_stitch_offsets()
+
+    print(f"\n=== Test Results ===")
+    print(f"Chunk planning test: {'PASS' if planning_ok else 'FAIL'}")
+    print(f"Chunk stitching test: {'PASS' if stitching_ok else 'FAIL'}")
+
+    if not (planning_ok and stitching_ok):
+        print(f"\n❌ Some tests failed. Please check the implementation.")
+        raise SystemExit(1)
+    print(f"\n🎉 All tests passed! Chunked transcripts stitch back onto the source timeline.")
+
+if __name__ == "__main__":
+    main()
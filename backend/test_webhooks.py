@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test script to verify webhook-driven completion against a stand-in AssemblyAI server
+"""
+
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WEBHOOK_TOKEN = "test-webhook-token"
+
+class FakeAssemblyAI(BaseHTTPRequestHandler):
+    """Accepts transcript submissions and counts how often each transcript is fetched"""
+    protocol_version = "HTTP/1.1"
+    submissions = []
+    fetches = {}
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeAssemblyAI.submissions.append(body)
+        transcript_id = f"transcript-{len(FakeAssemblyAI.submissions)}"
+        self._reply(200, {"id": transcript_id, "status": "queued", "audio_url": body["audio_url"]})
+
+    def do_GET(self):
+        transcript_id = self.path.rsplit("/", 1)[-1]
+        FakeAssemblyAI.fetches[transcript_id] = FakeAssemblyAI.fetches.get(transcript_id, 0) + 1
+        words = [
+            {"text": word, "start": i * 400, "end": i * 400 + 300, "confidence": 0.9, "speaker": "A"}
+            for i, word in enumerate("Hello from the webhook.".split())
+        ]
+        self._reply(200, {
+            "id": transcript_id,
+            "status": "completed",
+            "audio_url": "https://cdn.example/audio.mp3",
+            "text": "Hello from the webhook.",
+            "confidence": 0.9,
+            "audio_duration": 2,
+            "words": words,
+            "utterances": [{"text": "Hello from the webhook.", "start": 0, "end": 1500,
+                            "confidence": 0.9, "speaker": "A", "words": words}],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAssemblyAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def test_webhook_completion():
+    """Submit a job in webhook mode, deliver the callback and count upstream fetches"""
+    import httpx
+    import main
+    from config import settings
+    from models import TranscriptionStatus
+    from services.transcription_service import transcription_service
+
+    print("=== Testing Webhook-Driven Completion ===")
+
+    job_id = await transcription_service.create_job(
+        None, "webhook.mp3", audio_url="https://cdn.example/audio.mp3", file_size=1000
+    )
+    await transcription_service.submit_job(job_id)
+    transcript_id = transcription_service.get_job_info(job_id)["transcript_id"]
+
+    submitted = FakeAssemblyAI.submissions[-1]
+    print(f"\nSubmitted transcript: {transcript_id}")
+    if submitted.get("webhook_url") != "http://scribeeasy.test/webhooks/assemblyai":
+        print(f"❌ Submission has the wrong webhook_url: {submitted.get('webhook_url')}")
+        return False
+    if (submitted.get("webhook_auth_header_name") != settings.WEBHOOK_AUTH_HEADER_NAME
+            or submitted.get("webhook_auth_header_value") != WEBHOOK_TOKEN):
+        print("❌ Submission is missing the webhook auth header")
+        return False
+    print("✅ Submission points AssemblyAI at the authenticated webhook endpoint")
+
+    payload = {"transcript_id": transcript_id, "status": "completed"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        response = await client.post("/webhooks/assemblyai", json=payload,
+                                     headers={settings.WEBHOOK_AUTH_HEADER_NAME: "wrong"})
+        if response.status_code != 401:
+            print(f"❌ Callback with a bad token was accepted: {response.status_code}")
+            return False
+        print("✅ Callback with a bad token rejected with 401")
+
+        if FakeAssemblyAI.fetches.get(transcript_id):
+            print("❌ Transcript was fetched before the callback arrived")
+            return False
+
+        # AssemblyAI retries callbacks, so deliver it twice
+        for _ in range(2):
+            response = await client.post("/webhooks/assemblyai", json=payload,
+                                         headers={settings.WEBHOOK_AUTH_HEADER_NAME: WEBHOOK_TOKEN})
+            if response.status_code != 200:
+                print(f"❌ Callback rejected: {response.status_code} {response.text}")
+                return False
+        print("✅ Callbacks acknowledged")
+
+        response = await client.get(f"/status/{job_id}")
+        status = response.json()
+        print(f"Job status after callback: {status['status']}")
+        if status["status"] != TranscriptionStatus.COMPLETED.value:
+            print("❌ Job did not complete from the callback")
+            return False
+        print("✅ Job completed without any polling")
+
+    fetches = FakeAssemblyAI.fetches.get(transcript_id, 0)
+    print(f"Upstream transcript fetches: {fetches}")
+    if fetches != 1:
+        print("❌ Transcript should be fetched exactly once")
+        return False
+    print("✅ Transcript fetched exactly once")
+    return True
+
+def main():
+    """Main test function"""
+    server = start_fake_server()
+    os.environ.setdefault("ASSEMBLYAI_API_KEY", "test-key")
+    os.environ["ASSEMBLYAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["WEBHOOK_BASE_URL"] = "http://scribeeasy.test"
+    os.environ["WEBHOOK_AUTH_HEADER_VALUE"] = WEBHOOK_TOKEN
+    os.environ["JOB_STORE"] = "memory"
+
+    try:
+        success = asyncio.run(test_webhook_completion())
+    finally:
+        server.shutdown()
+
+    print(f"\n=== Test Results ===")
+    print(f"Webhook completion test: {'PASS' if success else 'FAIL'}")
+
+    if not success:
+        print(f"\n❌ Some tests failed. Please check the implementation.")
+        raise SystemExit(1)
+    print(f"\n🎉 All tests passed! Webhooks complete jobs with a single transcript fetch.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import re
+
+SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+
+def parse_silences(ffmpeg_output: str) -> List[Tuple[float, float]]:
+    """(start, end) pairs in seconds from ffmpeg silencedetect log output"""
+    silences = []
+    silence_start = None
+    for line in ffmpeg_output.splitlines():
+        match = SILENCE_START.search(line)
+        if match:
+            silence_start = max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END.search(line)
+        if match and silence_start is not None:
+            silences.append((silence_start, float(match.group(1))))
+            silence_start = None
+    return silences
+
+def plan_chunks(duration: float, silences: Sequence[Tuple[float, float]], chunk_seconds: float,
+                overlap: float, search_window: float) -> List[Dict[str, float]]:
+    """Split media of the given duration into overlapping chunks, cutting inside silences where possible
+
+    Each chunk covers [start, end] of the source, and owns [keep_start,
+    keep_end) of it; the owned ranges tile the whole duration so overlapping
+    words are kept exactly once.
+    """
+    cuts = [0.0]
+    target = chunk_seconds
+    while target < duration - chunk_seconds / 2:
+        # Prefer the middle of the silence nearest the target cut
+        best = None
+        for silence_start, silence_end in silences:
+            middle = (silence_start + silence_end) / 2
+            if middle <= cuts[-1] or abs(middle - target) > search_window:
+                continue
+            if best is None or abs(middle - target) < abs(best - target):
+                best = middle
+        cut = best if best is not None else target
+        cuts.append(cut)
+        target = cut + chunk_seconds
+    cuts.append(duration)
+
+    return [
+        {
+            "start": max(0.0, keep_start - overlap),
+            "end": min(duration, keep_end + overlap),
+            "keep_start": keep_start,
+            "keep_end": keep_end,
+        }
+        for keep_start, keep_end in zip(cuts, cuts[1:])
+    ]
+
+def _status(transcripts: Sequence[Any]) -> Tuple[str, Optional[str]]:
+    for index, transcript in enumerate(transcripts):
+        if transcript.status == "error":
+            return "error", f"Chunk {index + 1} failed: {transcript.error or 'Unknown error occurred'}"
+    if all(transcript.status == "completed" for transcript in transcripts):
+        return "completed", None
+    return "processing", None
+
+def stitch_transcripts(chunks: Sequence[Dict[str, float]], transcripts: Sequence[Any]) -> SimpleNamespace:
+    """Combine per-chunk transcripts into one transcript-like object on the source timeline
+
+    Word and utterance times are shifted by each chunk's start; words in the
+    overlaps are kept only by the chunk that owns them (by their midpoint).
+    Each chunk is diarized on its own, so when there are several chunks
+    speaker labels are prefixed with the chunk number ("A" in chunk 2
+    becomes "2A") rather than presented as the same speaker across chunks.
+    """
+    status, error = _status(transcripts)
+    if status != "completed":
+        return SimpleNamespace(status=status, error=error)
+
+    words = []
+    utterances = []
+    has_utterances = False
+    last = len(chunks) - 1
+    for index, (chunk, transcript) in enumerate(zip(chunks, transcripts)):
+        offset = int(round(chunk["start"] * 1000))
+        keep_start = chunk["keep_start"] * 1000 if index > 0 else float("-inf")
+        keep_end = chunk["keep_end"] * 1000 if index < last else float("inf")
+        prefix = f"{index + 1}" if last > 0 else ""
+
+        def owned(item) -> bool:
+            return keep_start <= offset + (item.start + item.end) / 2 < keep_end
+
+        def speaker(item) -> Optional[str]:
+            return prefix + item.speaker if item.speaker else item.speaker
+
+        def shifted(item):
+            return item.copy(update={
+                "start": item.start + offset, "end": item.end + offset, "speaker": speaker(item),
+            })
+
+        words.extend(shifted(word) for word in (transcript.words or ()) if owned(word))
+
+        for utterance in transcript.utterances or ():
+            has_utterances = True
+            if not utterance.words:
+                if owned(utterance):
+                    utterances.append(shifted(utterance))
+                continue
+            kept = [shifted(word) for word in utterance.words if owned(word)]
+            if not kept:
+                continue
+            text = utterance.text if len(kept) == len(utterance.words) else " ".join(word.text for word in kept)
+            utterances.append(utterance.copy(update={
+                "text": text, "start": kept[0].start, "end": kept[-1].end, "words": kept,
+                "speaker": speaker(utterance),
+            }))
+
+    confidences = [word.confidence for word in words if word.confidence is not None]
+    pieces = utterances if has_utterances else words
+    return SimpleNamespace(
+        status="completed",
+        error=None,
+        text=" ".join(piece.text for piece in pieces),
+        words=words,
+        utterances=utterances if has_utterances else None,
+        confidence=sum(confidences) / len(confidences) if confidences else None,
+        # Same unit as AssemblyAI's audio_duration (seconds)
+        audio_duration=max(
+            chunk["start"] + (transcript.audio_duration or 0) for chunk, transcript in zip(chunks, transcripts)
+        ) or None,
+    )
@@ -0,0 +1,88 @@
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+
+class ExpiryScheduler:
+    """Runs expiry callbacks at their deadlines from a single min-heap of timers"""
+
+    def __init__(self):
+        # (deadline, sequence, key) entries; superseded ones are skipped when popped
+        self.heap: List[Tuple[float, int, Hashable]] = []
+        self.timers: Dict[Hashable, Tuple[float, int, Callable[[], None]]] = {}
+        self.fired = 0
+        self._sequence = itertools.count()
+        self._task = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def schedule(self, key: Hashable, deadline: float, callback: Callable[[], None]):
+        """Run callback at deadline, replacing any timer already set for key"""
+        sequence = next(self._sequence)
+        self.timers[key] = (deadline, sequence, callback)
+        heapq.heappush(self.heap, (deadline, sequence, key))
+        if self._wakeup is not None and self.heap[0][1] == sequence:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable):
+        """Drop the timer for key; its heap entry is discarded lazily"""
+        self.timers.pop(key, None)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        timer = self.timers.get(key)
+        return timer[0] if timer else None
+
+    def start(self):
+        """Start the scheduler task"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def run_due(self, now: float) -> int:
+        """Fire every timer whose deadline has passed"""
+        fired = 0
+        while self.heap and self.heap[0][0] <= now:
+            deadline, sequence, key = heapq.heappop(self.heap)
+            timer = self.timers.get(key)
+            if timer is None or timer[1] != sequence:
+                continue
+            del self.timers[key]
+            fired += 1
+            try:
+                timer[2]()
+            except Exception as e:
+                print(f"ERROR: Expiry callback for {key} failed: {e}")
+
+        # Rebuild once cancelled entries dominate the heap
+        if len(self.heap) > 64 and len(self.heap) > 2 * len(self.timers):
+            self.heap = [(deadline, sequence, key) for key, (deadline, sequence, _) in self.timers.items()]
+            heapq.heapify(self.heap)
+
+        self.fired += fired
+        return fired
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            self.run_due(now)
+
+            timeout = self.heap[0][0] - now if self.heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        """Return scheduler counters"""
+        return {
+            "pending": len(self.timers),
+            "heap_size": len(self.heap),
+            "fired": self.fired,
+        }
+
+# Global instance
+expiry_scheduler = ExpiryScheduler()
@@ -1,88 +1,127 @@
-from typing import List
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence
 from models import SubtitleSegment, OutputFormat
+import json
 import re
 
-class FormatConverter:
-    @staticmethod
-    def to_srt(segments: List[SubtitleSegment]) -> str:
-        """Convert segments to SRT format with speaker labels"""
-        srt_content = []
-
-        for i, segment in enumerate(segments, 1):
-            start_time = FormatConverter._seconds_to_srt_time(segment.start)
-            end_time = FormatConverter._seconds_to_srt_time(segment.end)
+# Cues rendered into each yielded chunk; bounds memory per download
+CUES_PER_CHUNK = 512
+TEXT_CHUNK_CHARS = 65536
 
-            # Format text with speaker label if available
-            text = segment.text
-            if segment.speaker:
-                text = f"[{segment.speaker}] {text}"
+# Zero-padded digit strings indexed by value, so timestamps need no per-field formatting
+PAD2 = [f"{i:02d}" for i in range(100)]
+PAD3 = [f"{i:03d}" for i in range(1000)]
 
-            srt_content.append(f"{i}")
-            srt_content.append(f"{start_time} --> {end_time}")
-            srt_content.append(text)
-            srt_content.append("")  # Empty line between segments
+def _batches(segments: Iterable[SubtitleSegment]) -> Iterator[List[SubtitleSegment]]:
+    iterator = iter(segments)
+    while True:
+        batch = list(islice(iterator, CUES_PER_CHUNK))
+        if not batch:
+            return
+        yield batch
 
-        return "\n".join(srt_content)
-    
+class FormatConverter:
     @staticmethod
-    def to_vtt(segments: List[SubtitleSegment]) -> str:
-        """Convert segments to WebVTT format with speaker labels"""
-        vtt_content = ["WEBVTT", ""]
-
-        for segment in segments:
-            start_time = FormatConverter._seconds_to_vtt_time(segment.start)
-            end_time = FormatConverter._seconds_to_vtt_time(segment.end)
+    def render(format_type: OutputFormat, text: Optional[str],
+               segments: Sequence[SubtitleSegment]) -> Iterator[bytes]:
+        """Render an export in the given format as UTF-8 encoded chunks"""
+        if format_type == OutputFormat.SRT:
+            return FormatConverter.render_srt(segments)
+        if format_type == OutputFormat.VTT:
+            return FormatConverter.render_vtt(segments)
+        return FormatConverter.render_txt(text, segments)
 
-            # Format text with speaker label if available
-            text = segment.text
-            if segment.speaker:
-                text = f"<v {segment.speaker}>{text}"
+    @staticmethod
+    def render_srt(segments: Iterable[SubtitleSegment]) -> Iterator[bytes]:
+        """Render segments as SRT with speaker labels, a batch of cues per chunk"""
+        number = 0
+        for batch in _batches(segments):
+            start_times = FormatConverter.format_timestamps([segment.start for segment in batch], ",")
+            end_times = FormatConverter.format_timestamps([segment.end for segment in batch], ",")
+            cues = []
+            for segment, start_time, end_time in zip(batch, start_times, end_times):
+                number += 1
+                # Format text with speaker label if available
+                text = f"[{segment.speaker}] {segment.text}" if segment.speaker else segment.text
+                # Cues are separated by an empty line
+                separator = "\n" if number > 1 else ""
+                cues.append(f"{separator}{number}\n{start_time} --> {end_time}\n{text}\n")
+            yield "".join(cues).encode("utf-8")
 
-            vtt_content.append(f"{start_time} --> {end_time}")
-            vtt_content.append(text)
-            vtt_content.append("")  # Empty line between segments
+    @staticmethod
+    def render_vtt(segments: Iterable[SubtitleSegment]) -> Iterator[bytes]:
+        """Render segments as WebVTT with speaker labels, a batch of cues per chunk"""
+        yield b"WEBVTT\n"
+        for batch in _batches(segments):
+            start_times = FormatConverter.format_timestamps([segment.start for segment in batch], ".")
+            end_times = FormatConverter.format_timestamps([segment.end for segment in batch], ".")
+            cues = []
+            for segment, start_time, end_time in zip(batch, start_times, end_times):
+                # Format text with speaker label if available
+                text = f"<v {segment.speaker}>{segment.text}" if segment.speaker else segment.text
+                cues.append(f"\n{start_time} --> {end_time}\n{text}\n")
+            yield "".join(cues).encode("utf-8")
 
-        return "\n".join(vtt_content)
-    
     @staticmethod
-    def to_txt(text: str, segments: List[SubtitleSegment] = None) -> str:
-        """Convert to plain text format with speaker labels"""
+    def render_txt(text: Optional[str], segments: Iterable[SubtitleSegment] = ()) -> Iterator[bytes]:
+        """Render plain text with speaker labels"""
         if text:
             # Clean up the text
             cleaned_text = re.sub(r'\s+', ' ', text.strip())
-            return cleaned_text
-        elif segments:
-            # Fallback to segments if no full text available, include speaker labels
-            lines = []
-            for segment in segments:
-                if segment.speaker:
-                    lines.append(f"[{segment.speaker}] {segment.text}")
-                else:
-                    lines.append(segment.text)
-            return "\n".join(lines)
-        else:
-            return ""
-    
+            for offset in range(0, len(cleaned_text), TEXT_CHUNK_CHARS):
+                yield cleaned_text[offset:offset + TEXT_CHUNK_CHARS].encode("utf-8")
+            return
+
+        # Fallback to segments if no full text available, include speaker labels
+        lines = []
+        for i, segment in enumerate(segments):
+            line = f"[{segment.speaker}] {segment.text}" if segment.speaker else segment.text
+            lines.append(f"\n{line}" if i else line)
+            if len(lines) >= CUES_PER_CHUNK:
+                yield "".join(lines).encode("utf-8")
+                lines = []
+
+        if lines:
+            yield "".join(lines).encode("utf-8")
+
+    @staticmethod
+    def render_json(segments: Iterable[SubtitleSegment]) -> Iterator[bytes]:
+        """Render segments as a JSON array of start/end/text/speaker objects, a batch per chunk"""
+        yield b"["
+        separator = ""
+        for batch in _batches(segments):
+            items = [
+                json.dumps({"start": segment.start, "end": segment.end, "text": segment.text, "speaker": segment.speaker})
+                for segment in batch
+            ]
+            yield (separator + ",".join(items)).encode("utf-8")
+            separator = ","
+        yield b"]"
+
+    @staticmethod
+    def format_timestamps(seconds: Sequence[float], decimal_mark: str = ",") -> List[str]:
+        """Format many times as HH:MM:SS,mmm (or .mmm) in one batch
+
+        All times are first rounded to whole milliseconds, so e.g. 2.3 s
+        renders as 2,300 rather than truncating 2299.999... ms to 2,299.
+        """
+        pad2, pad3 = PAD2, PAD3
+        return [
+            f"{pad2[ms // 3600000] if ms < 360000000 else ms // 3600000}:"
+            f"{pad2[ms // 60000 % 60]}:{pad2[ms // 1000 % 60]}{decimal_mark}{pad3[ms % 1000]}"
+            for ms in [round(value * 1000) for value in seconds]
+        ]
+
     @staticmethod
     def _seconds_to_srt_time(seconds: float) -> str:
         """Convert seconds to SRT time format (HH:MM:SS,mmm)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds % 1) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
-    
+        return FormatConverter.format_timestamps((seconds,), ",")[0]
+
     @staticmethod
     def _seconds_to_vtt_time(seconds: float) -> str:
         """Convert seconds to WebVTT time format (HH:MM:SS.mmm)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds % 1) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
-    
+        return FormatConverter.format_timestamps((seconds,), ".")[0]
+
     @staticmethod
     def get_content_type(format_type: OutputFormat) -> str:
         """Get appropriate content type for format"""
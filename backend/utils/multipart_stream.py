@@ -0,0 +1,96 @@
+from typing import AsyncIterator, Dict, List, Optional
+from fastapi import HTTPException
+from multipart.multipart import MultipartParser, parse_options_header
+
+class MultipartFileReader:
+    """Reads one file field out of a multipart body while it is still arriving"""
+
+    def __init__(self, body: AsyncIterator[bytes], content_type: str, field_name: str = "file"):
+        media_type, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+        self.filename: Optional[str] = None
+        self._body = body.__aiter__()
+        self._field_name = field_name.encode()
+        self._pending: List[bytes] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._file_done = False
+        self._body_done = False
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self.filename is None and options.get(b"name") == self._field_name and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._pending.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
+
+    async def _feed(self) -> bool:
+        """Push the next body chunk through the parser; False once the body is exhausted"""
+        if self._body_done:
+            return False
+        try:
+            chunk = await self._body.__anext__()
+        except StopAsyncIteration:
+            self._body_done = True
+            self._parser.finalize()
+            return False
+        if chunk:
+            self._parser.write(chunk)
+        return True
+
+    async def read_filename(self) -> str:
+        """Consume the body up to the file part's headers and return its filename"""
+        while self.filename is None:
+            if not await self._feed():
+                raise HTTPException(status_code=400, detail=f"No '{self._field_name.decode()}' file field in upload")
+        return self.filename
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Yield the file's bytes as they are received"""
+        while True:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                for piece in pending:
+                    yield piece
+            if self._file_done:
+                return
+            if not await self._feed() and not self._pending:
+                if not self._file_done:
+                    raise HTTPException(status_code=400, detail="Upload ended before the file was complete")
+                return
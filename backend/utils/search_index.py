@@ -0,0 +1,165 @@
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from typing import Dict, FrozenSet, List, Sequence
+import json
+import re
+import struct
+
+TOKEN = re.compile(r"\w+(?:'\w+)*")
+# Serialized layout: token count and vocabulary length, JSON vocabulary, then the raw columns
+HEADER = struct.Struct("<II")
+
+def tokenize(text: str) -> List[str]:
+    """Normalized search tokens of a text: case-folded words, punctuation dropped"""
+    return TOKEN.findall(text.casefold())
+
+class TranscriptIndex:
+    """Inverted index over the words of one transcript
+
+    Every token position stores its vocabulary id, start time (ms) and the
+    segment it belongs to; postings map each id to its positions. Queries
+    are phrases of one or more words, where a trailing * makes a word a
+    prefix. Only the token columns are persisted; postings and the sorted
+    vocabulary are rebuilt in one pass on load.
+    """
+
+    def __init__(self, vocabulary: Sequence[str], token_ids: array, starts: array, segments: array):
+        self.vocabulary = list(vocabulary)
+        self.token_ids = token_ids
+        self.starts = starts
+        self.segments = segments
+
+        positions: Dict[int, array] = {}
+        for position, token_id in enumerate(token_ids):
+            postings = positions.get(token_id)
+            if postings is None:
+                postings = positions[token_id] = array("i")
+            postings.append(position)
+        self.postings = positions
+        self.vocabulary_ids = {token: token_id for token_id, token in enumerate(self.vocabulary)}
+        # Vocabulary in sorted order, for prefix lookups
+        self.sorted_ids = sorted(range(len(self.vocabulary)), key=self.vocabulary.__getitem__)
+        self.sorted_tokens = [self.vocabulary[token_id] for token_id in self.sorted_ids]
+
+    @classmethod
+    def build(cls, texts: Sequence[str], starts_ms: Sequence[int],
+              segment_starts: Sequence[float]) -> "TranscriptIndex":
+        """Index word texts with their start times, assigning each to the segment it falls in
+
+        Both the words and the segment starts (seconds) must be in time order.
+        """
+        vocabulary_ids: Dict[str, int] = {}
+        token_ids = array("i")
+        starts = array("q")
+        segments = array("i")
+        segment_index = 0
+        last_segment = len(segment_starts) - 1
+        for text, start in zip(texts, starts_ms):
+            # Merge walk over both time-ordered sequences
+            while segment_index < last_segment and round(segment_starts[segment_index + 1] * 1000) <= start:
+                segment_index += 1
+            for token in tokenize(text):
+                token_ids.append(vocabulary_ids.setdefault(token, len(vocabulary_ids)))
+                starts.append(start)
+                segments.append(segment_index)
+        return cls(list(vocabulary_ids), token_ids, starts, segments)
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def _term_ids(self, term: str, prefix: bool) -> FrozenSet[int]:
+        if not prefix:
+            token_id = self.vocabulary_ids.get(term)
+            return frozenset((token_id,)) if token_id is not None else frozenset()
+
+        first = bisect_left(self.sorted_tokens, term)
+        # Every token starting with term sorts before term + the highest code point
+        last = bisect_left(self.sorted_tokens, term + "\U0010ffff", first)
+        return frozenset(self.sorted_ids[first:last])
+
+    def _parse(self, query: str) -> List[FrozenSet[int]]:
+        terms = []
+        for piece in query.split():
+            tokens = tokenize(piece)
+            for number, token in enumerate(tokens, 1):
+                terms.append(self._term_ids(token, prefix=number == len(tokens) and piece.endswith("*")))
+        return terms
+
+    def search(self, query: str) -> Sequence[int]:
+        """Token positions where the query phrase starts, in time order"""
+        terms = self._parse(query)
+        if not terms or not all(terms):
+            return []
+
+        if len(terms) == 1:
+            # A single word has no neighbours to check
+            ids = terms[0]
+            if len(ids) == 1:
+                return self.postings[next(iter(ids))]
+            return sorted(chain.from_iterable(self.postings[token_id] for token_id in ids))
+
+        # Walk the postings of the rarest term and check the other words in place
+        counts = [sum(len(self.postings[token_id]) for token_id in ids) for ids in terms]
+        anchor = counts.index(min(counts))
+        anchor_ids = terms[anchor]
+        if len(anchor_ids) == 1:
+            candidates = self.postings[next(iter(anchor_ids))]
+        else:
+            # Timsort merges the already sorted runs in C
+            candidates = sorted(chain.from_iterable(self.postings[token_id] for token_id in anchor_ids))
+        checks = [
+            (offset - anchor, next(iter(ids)) if len(ids) == 1 else ids)
+            for offset, ids in enumerate(terms) if offset != anchor
+        ]
+
+        token_ids = self.token_ids
+        lowest = anchor
+        highest = len(token_ids) - len(terms) + anchor
+        matches = []
+        for position in candidates:
+            if position < lowest or position > highest:
+                continue
+            for delta, expected in checks:
+                token_id = token_ids[position + delta]
+                if token_id != expected if type(expected) is int else token_id not in expected:
+                    break
+            else:
+                matches.append(position - anchor)
+        return matches
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint in bytes, postings included"""
+        return (
+            256 + 24 * len(self) + sum(72 + len(token) for token in self.vocabulary)
+            + 100 * len(self.postings)
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize the token columns; they are written in native byte order"""
+        vocabulary = json.dumps(self.vocabulary).encode("utf-8")
+        return b"".join([
+            HEADER.pack(len(self), len(vocabulary)),
+            vocabulary,
+            self.token_ids.tobytes(),
+            self.starts.tobytes(),
+            self.segments.tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TranscriptIndex":
+        count, vocabulary_length = HEADER.unpack_from(data)
+        position = HEADER.size
+        vocabulary = json.loads(data[position:position + vocabulary_length])
+        position += vocabulary_length
+
+        columns = []
+        for typecode in ("i", "q", "i"):
+            column = array(typecode)
+            size = column.itemsize * count
+            column.frombytes(data[position:position + size])
+            position += size
+            columns.append(column)
+        token_ids, starts, segments = columns
+        return cls(vocabulary, token_ids, starts, segments)
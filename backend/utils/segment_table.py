@@ -0,0 +1,119 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from models import SubtitleSegment
+import json
+import struct
+
+# Serialized layout: segment count and header length, JSON header, then the raw columns
+HEADER = struct.Struct("<II")
+
+class SegmentRow(NamedTuple):
+    """Lightweight read-only view of one segment"""
+    start: float
+    end: float
+    text: str
+    speaker: Optional[str]
+
+class SegmentTable:
+    """Subtitle segments of a transcript stored column by column
+
+    starts/ends are float seconds, speakers holds ids into speaker_names
+    (-1 for unlabelled segments), and all texts share one buffer cut at
+    offsets (one more entry than there are segments). Segments are in time
+    order, so starts doubles as a sorted index. Tables are immutable once
+    built; SubtitleSegment models are only created for the rows an API
+    response actually returns.
+    """
+
+    def __init__(self, starts: array, ends: array, speakers: array,
+                 speaker_names: Sequence[str], text: str, offsets: array):
+        self.starts = starts
+        self.ends = ends
+        self.speakers = speakers
+        self.speaker_names = list(speaker_names)
+        self.text = text
+        self.offsets = offsets
+        # Running maximum of ends, built on the first time-window lookup
+        self._max_ends: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[SegmentRow]:
+        return self.rows()
+
+    def segment_text(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+    def speaker(self, index: int) -> Optional[str]:
+        speaker_id = self.speakers[index]
+        return self.speaker_names[speaker_id] if speaker_id >= 0 else None
+
+    def row(self, index: int) -> SegmentRow:
+        return SegmentRow(self.starts[index], self.ends[index], self.segment_text(index), self.speaker(index))
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """Index range [first, last) of the segments overlapping start..end seconds, by binary search
+
+        Both bounds are optional. When cues overlap, the range may also hold
+        a few segments that end before start.
+        """
+        first, last = 0, len(self)
+        if end is not None:
+            last = bisect_left(self.starts, end)
+        if start is not None:
+            if self._max_ends is None:
+                # Unlike ends themselves, the running maximum is sorted even when cues overlap
+                self._max_ends = array("d", accumulate(self.ends, max))
+            first = min(bisect_right(self._max_ends, start), last)
+        return first, last
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[SegmentRow]:
+        """Iterate over segments start..stop without building models"""
+        for index in range(*slice(start, stop).indices(len(self))):
+            yield self.row(index)
+
+    def to_segments(self, start: int = 0, stop: Optional[int] = None) -> List[SubtitleSegment]:
+        """SubtitleSegment models for segments start..stop, for API responses"""
+        # Columns are already typed, so validation would only cost time
+        return [SubtitleSegment.model_construct(**row._asdict()) for row in self.rows(start, stop)]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint in bytes"""
+        return (
+            256 + len(self.text) + 8 * len(self)
+            + sum(column.itemsize * len(column) for column in (self.starts, self.ends, self.speakers, self.offsets))
+            + sum(64 + len(name) for name in self.speaker_names)
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize the table; columns are written in native byte order"""
+        header = json.dumps({"speakers": self.speaker_names, "text": self.text}).encode("utf-8")
+        return b"".join([
+            HEADER.pack(len(self), len(header)),
+            header,
+            self.starts.tobytes(),
+            self.ends.tobytes(),
+            self.speakers.tobytes(),
+            self.offsets.tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SegmentTable":
+        count, header_length = HEADER.unpack_from(data)
+        position = HEADER.size
+        header = json.loads(data[position:position + header_length])
+        position += header_length
+
+        columns = []
+        for typecode, length in (("d", count), ("d", count), ("i", count), ("q", count + 1)):
+            column = array(typecode)
+            size = column.itemsize * length
+            column.frombytes(data[position:position + size])
+            position += size
+            columns.append(column)
+        starts, ends, speakers, offsets = columns
+        return cls(starts, ends, speakers, header["speakers"], header["text"], offsets)
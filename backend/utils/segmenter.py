@@ -0,0 +1,120 @@
+from array import array
+from typing import Dict, List, Optional
+from utils.segment_table import SegmentTable
+
+SENTENCE_ENDINGS = (".", "!", "?")
+# Utterances shorter than this stay a single cue
+UTTERANCE_SPLIT_MIN_CHARS = 100
+# Cue length cap when there are no utterances to follow
+WORD_CUE_MAX_MS = 5000
+
+class WordColumns:
+    """Word timings of a transcript as parallel array columns
+
+    starts/ends are in milliseconds, speakers holds interned speaker ids
+    (-1 for unlabelled words) and groups the index of the utterance a word
+    belongs to (-1 when there are no utterances).
+    """
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.speakers = array("i")
+        self.groups = array("i")
+        self.texts: List[str] = []
+        self.speaker_names: List[str] = []
+        # Character length of each utterance, indexed by group
+        self.group_chars = array("i")
+        self._speaker_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def speaker_id(self, speaker: Optional[str]) -> int:
+        if speaker is None:
+            return -1
+        speaker_id = self._speaker_ids.get(speaker)
+        if speaker_id is None:
+            speaker_id = self._speaker_ids[speaker] = len(self.speaker_names)
+            self.speaker_names.append(speaker)
+        return speaker_id
+
+    def add(self, text: str, start: int, end: int, speaker: Optional[str], group: int = -1):
+        self.texts.append(text)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.speakers.append(self.speaker_id(speaker))
+        self.groups.append(group)
+
+    @classmethod
+    def from_words(cls, words) -> "WordColumns":
+        """Columns for a flat list of AssemblyAI words"""
+        columns = cls()
+        for word in words:
+            columns.add(word.text, word.start, word.end, getattr(word, "speaker", None))
+        return columns
+
+    @classmethod
+    def from_utterances(cls, utterances) -> "WordColumns":
+        """Columns for AssemblyAI utterances, keeping each utterance's words together"""
+        columns = cls()
+        for group, utterance in enumerate(utterances):
+            columns.group_chars.append(len(utterance.text or ""))
+            words = getattr(utterance, "words", None)
+            if not words:
+                # Nothing to align against, so the utterance is one unit
+                columns.add((utterance.text or "").strip(), utterance.start, utterance.end, utterance.speaker, group)
+                continue
+            for word in words:
+                # Utterance speaker labels win over per-word ones
+                columns.add(word.text, word.start, word.end, utterance.speaker, group)
+        return columns
+
+
+def segment(columns: WordColumns, max_cue_ms: Optional[int] = None,
+            min_split_chars: int = 0) -> SegmentTable:
+    """Group words into subtitle cues in a single pass
+
+    A cue always ends at an utterance boundary or speaker change. It also
+    ends after a sentence-ending word, unless its utterance is shorter than
+    min_split_chars, and after the word that takes it past max_cue_ms.
+    Cue times are the first word's start and the last word's end.
+    """
+    cue_starts = array("d")
+    cue_ends = array("d")
+    cue_speakers = array("i")
+    cue_texts = []
+    offsets = array("q", [0])
+    count = len(columns)
+
+    starts, ends, speakers, groups, texts = (
+        columns.starts, columns.ends, columns.speakers, columns.groups, columns.texts
+    )
+    group_chars = columns.group_chars
+    cue_first = 0
+    for index in range(count):
+        last = index == count - 1
+        text = texts[index]
+        if last:
+            boundary = True
+        elif groups[index + 1] != groups[index] or (
+                speakers[index + 1] != speakers[index] and speakers[index] >= 0 and speakers[index + 1] >= 0):
+            boundary = True
+        elif text.endswith(SENTENCE_ENDINGS) and (
+                groups[index] < 0 or group_chars[groups[index]] >= min_split_chars):
+            boundary = True
+        elif max_cue_ms is not None and ends[index] - starts[cue_first] > max_cue_ms:
+            boundary = True
+        else:
+            boundary = False
+
+        if boundary:
+            cue_text = " ".join(texts[cue_first:index + 1]).strip()
+            cue_starts.append(starts[cue_first] / 1000.0)
+            cue_ends.append(ends[index] / 1000.0)
+            cue_speakers.append(speakers[cue_first])
+            cue_texts.append(cue_text)
+            offsets.append(offsets[-1] + len(cue_text))
+            cue_first = index + 1
+
+    return SegmentTable(cue_starts, cue_ends, cue_speakers, columns.speaker_names, "".join(cue_texts), offsets)
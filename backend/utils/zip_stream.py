@@ -0,0 +1,47 @@
+from typing import Iterable, Iterator, Optional, Tuple
+import time
+import zipfile
+
+class _ChunkSink:
+    """Write-only target that holds what ZipFile writes until it is drained
+
+    It has no tell() or seek(), so ZipFile writes each entry's sizes and
+    CRC in a data descriptor after its data instead of seeking back.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+def stream_zip(entries: Iterable[Tuple[str, Iterator[bytes]]], modified: Optional[float] = None) -> Iterator[bytes]:
+    """Yield a deflated ZIP archive of (name, chunks) entries as it is built
+
+    Each entry is compressed while its chunks are consumed, so only one
+    chunk and the compressor state are held in memory at a time.
+    """
+    date_time = time.localtime(modified if modified is not None else time.time())[:6]
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for name, chunks in entries:
+            info = zipfile.ZipInfo(name, date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w") as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    # Central directory
+    yield sink.drain()
@@ -4,6 +4,7 @@ import apiService from '../services/api'
 
 const TranscriptionStatus = ({ jobId, filename, onComplete, onError }) => {
   const [status, setStatus] = useState('queued')
+  const [queuePosition, setQueuePosition] = useState(null)
   const [progress, setProgress] = useState(0)
   const [elapsedTime, setElapsedTime] = useState(0)
   const [estimatedTime, setEstimatedTime] = useState(null)
@@ -11,36 +12,78 @@ const TranscriptionStatus = ({ jobId, filename, onComplete, onError }) => {
   useEffect(() => {
     let pollInterval
     let timeInterval
+    let unsubscribe
+    let finished = false
+
+    const stopAll = () => {
+      finished = true
+      clearInterval(pollInterval)
+      clearInterval(timeInterval)
+      unsubscribe?.()
+    }
+
+    const handleResult = (result) => {
+      setStatus(result.status)
+      setQueuePosition(result.queue_position ?? null)
+
+      if (result.status === 'completed') {
+        stopAll()
+        onComplete(result)
+      } else if (result.status === 'error') {
+        stopAll()
+        onError(result.error || 'Transcription failed')
+      } else if (result.status === 'processing') {
+        // Simulate progress for better UX
+        setProgress(prev => Math.min(prev + Math.random() * 10, 85))
+      }
+    }
 
     const pollStatus = async () => {
       try {
-        const result = await apiService.getTranscriptionStatus(jobId)
-        setStatus(result.status)
-
-        if (result.status === 'completed') {
-          clearInterval(pollInterval)
-          clearInterval(timeInterval)
-          onComplete(result)
-        } else if (result.status === 'error') {
-          clearInterval(pollInterval)
-          clearInterval(timeInterval)
-          onError(result.error || 'Transcription failed')
-        } else if (result.status === 'processing') {
-          // Simulate progress for better UX
-          setProgress(prev => Math.min(prev + Math.random() * 10, 85))
-        }
+        handleResult(await apiService.getTranscriptionStatus(jobId))
       } catch (error) {
-        clearInterval(pollInterval)
-        clearInterval(timeInterval)
+        stopAll()
         onError(error.message || 'Failed to check transcription status')
       }
     }
 
-    // Start polling immediately
-    pollStatus()
-    
-    // Poll every 3 seconds
-    pollInterval = setInterval(pollStatus, 3000)
+    const startPolling = () => {
+      // Start polling immediately
+      pollStatus()
+
+      // Poll every 3 seconds
+      pollInterval = setInterval(pollStatus, 3000)
+    }
+
+    if (typeof EventSource !== 'undefined') {
+      // Status changes are pushed by the server; fetch the full result once at the end
+      unsubscribe = apiService.subscribeToStatus(jobId, {
+        onStatus: (event) => {
+          if (event.status === 'processing' || event.status === 'queued') {
+            handleResult(event)
+          }
+        },
+        onResult: (summary) => {
+          if (summary.status === 'completed') {
+            pollStatus()
+          } else {
+            handleResult(summary)
+          }
+        },
+        onExpired: () => {
+          stopAll()
+          onError('This transcription job has expired')
+        },
+        onError: () => {
+          // Fall back to polling if the event stream is unavailable
+          if (!finished) {
+            startPolling()
+          }
+        },
+      })
+    } else {
+      startPolling()
+    }
 
     // Update elapsed time every second
     timeInterval = setInterval(() => {
@@ -48,8 +91,10 @@ const TranscriptionStatus = ({ jobId, filename, onComplete, onError }) => {
     }, 1000)
 
     return () => {
+      finished = true
       clearInterval(pollInterval)
       clearInterval(timeInterval)
+      unsubscribe?.()
     }
   }, [jobId, onComplete, onError])
 
@@ -86,6 +131,9 @@ const TranscriptionStatus = ({ jobId, filename, onComplete, onError }) => {
   const getStatusMessage = () => {
     switch (status) {
       case 'queued':
+        if (queuePosition) {
+          return `Your file is number ${queuePosition} in the queue and will be processed shortly...`
+        }
         return 'Your file is in the queue and will be processed shortly...'
       case 'processing':
         return 'AI is analyzing your audio and generating the transcription...'
@@ -1,6 +1,11 @@
 import axios from 'axios'
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
+const STREAM_UPLOADS = import.meta.env.VITE_STREAM_UPLOADS === 'true'
+// Files at least this large go through resumable upload sessions, several parts at a time
+const RESUMABLE_UPLOAD_MIN_BYTES = 64 * 1024 * 1024
+const RESUMABLE_UPLOAD_PARALLEL_PARTS = 4
+const RESUMABLE_UPLOAD_PART_RETRIES = 3
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -33,6 +38,13 @@ api.interceptors.response.use(
       throw new Error('File too large. Please choose a smaller file.')
     } else if (error.response?.status === 400) {
       throw new Error(error.response.data?.detail || 'Invalid request')
+    } else if (error.response?.status === 429) {
+      const retryAfter = error.response.headers?.['retry-after']
+      throw new Error(
+        retryAfter
+          ? `Too many transcriptions are waiting. Please try again in ${retryAfter} seconds.`
+          : 'Too many transcriptions are waiting. Please try again later.'
+      )
     } else if (error.response?.status === 500) {
       throw new Error('Server error. Please try again later.')
     } else if (error.code === 'ECONNABORTED') {
@@ -48,10 +60,17 @@ api.interceptors.response.use(
 export const apiService = {
   // Upload file and start transcription
   async uploadFile(file, onUploadProgress = null) {
+    if (!STREAM_UPLOADS && file.size >= RESUMABLE_UPLOAD_MIN_BYTES) {
+      return this.uploadFileResumable(file, onUploadProgress)
+    }
+
     const formData = new FormData()
     formData.append('file', file)
 
-    const response = await api.post('/upload', formData, {
+    // Streamed uploads are forwarded to AssemblyAI while they are received
+    const uploadPath = STREAM_UPLOADS ? '/upload/stream' : '/upload'
+
+    const response = await api.post(uploadPath, formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
@@ -65,12 +84,127 @@ export const apiService = {
     return response.data
   },
 
+  // Upload a large file as byte ranges sent in parallel; an interrupted upload of the
+  // same file resumes from the ranges the server already has
+  async uploadFileResumable(file, onUploadProgress = null) {
+    const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`
+    let session = null
+
+    const savedId = localStorage.getItem(resumeKey)
+    if (savedId) {
+      try {
+        session = (await api.get(`/upload/sessions/${savedId}`)).data
+      } catch {
+        localStorage.removeItem(resumeKey)
+      }
+    }
+    if (!session) {
+      session = (await api.post('/upload/sessions', { filename: file.name, size: file.size })).data
+      localStorage.setItem(resumeKey, session.upload_id)
+    }
+
+    // Split what is still missing into parts
+    const parts = []
+    for (const [start, end] of session.missing_ranges) {
+      for (let offset = start; offset < end; offset += session.part_size) {
+        parts.push([offset, Math.min(offset + session.part_size, end)])
+      }
+    }
+
+    let uploaded = session.received_bytes
+    const reportProgress = () => onUploadProgress?.(Math.round((uploaded * 100) / file.size))
+    reportProgress()
+
+    const sendPart = async ([start, end]) => {
+      for (let attempt = 1; ; attempt++) {
+        try {
+          await api.put(`/upload/sessions/${session.upload_id}`, file.slice(start, end), {
+            headers: {
+              'Content-Type': 'application/octet-stream',
+              'Content-Range': `bytes ${start}-${end - 1}/${file.size}`,
+            },
+            timeout: 300000, // 5 minutes per part
+          })
+          uploaded += end - start
+          reportProgress()
+          return
+        } catch (error) {
+          if (attempt >= RESUMABLE_UPLOAD_PART_RETRIES) throw error
+        }
+      }
+    }
+
+    const workers = Array.from({ length: RESUMABLE_UPLOAD_PARALLEL_PARTS }, async () => {
+      while (parts.length) {
+        await sendPart(parts.shift())
+      }
+    })
+    await Promise.all(workers)
+
+    const response = await api.post(`/upload/sessions/${session.upload_id}/complete`)
+    localStorage.removeItem(resumeKey)
+    return response.data
+  },
+
+  // Upload several files in one request; each gets its own job id or error
+  async uploadFiles(files, onUploadProgress = null) {
+    const formData = new FormData()
+    for (const file of files) {
+      formData.append('files', file)
+    }
+
+    const response = await api.post('/upload/batch', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+      timeout: 0, // Large batches are bounded by bandwidth, not a fixed timeout
+      onUploadProgress: onUploadProgress ? (progressEvent) => {
+        const percentCompleted = Math.round((progressEvent.loaded * 100) / progressEvent.total)
+        onUploadProgress(percentCompleted)
+      } : undefined,
+    })
+
+    return response.data
+  },
+
   // Get transcription status
   async getTranscriptionStatus(jobId) {
     const response = await api.get(`/status/${jobId}`)
     return response.data
   },
 
+  // Get compact status records for many jobs in one request
+  async getTranscriptionStatuses(jobIds) {
+    const response = await api.post('/status', { ids: jobIds })
+    return response.data
+  },
+
+  // Subscribe to pushed status updates (Server-Sent Events); returns an unsubscribe function
+  subscribeToStatus(jobId, { onStatus, onResult, onExpired, onError } = {}) {
+    const source = new EventSource(`${API_BASE_URL}/events/${jobId}`)
+
+    source.addEventListener('status', (event) => {
+      onStatus?.(JSON.parse(event.data))
+    })
+
+    source.addEventListener('result', (event) => {
+      source.close()
+      onResult?.(JSON.parse(event.data))
+    })
+
+    source.addEventListener('expired', (event) => {
+      source.close()
+      onExpired?.(JSON.parse(event.data))
+    })
+
+    source.onerror = (error) => {
+      source.close()
+      onError?.(error)
+    }
+
+    return () => source.close()
+  },
+
   // Get transcription preview
   async getTranscriptionPreview(jobId, lines = 10) {
     const response = await api.get(`/preview/${jobId}`, {
@@ -79,7 +213,23 @@ export const apiService = {
     return response.data
   },
 
-  // Download transcription in specified format
+  // Get a page of segments, optionally only those overlapping start..end seconds
+  async getSegments(jobId, { offset = 0, limit = 100, start, end } = {}) {
+    const response = await api.get(`/segments/${jobId}`, {
+      params: { offset, limit, start, end }
+    })
+    return response.data
+  },
+
+  // Find where a phrase is spoken; end a word with * to match it as a prefix
+  async searchTranscription(jobId, query, limit = 20) {
+    const response = await api.get(`/search/${jobId}`, {
+      params: { q: query, limit }
+    })
+    return response.data
+  },
+
+  // Download transcription in specified format ('bundle' for a ZIP of all formats)
   async downloadTranscription(jobId, format) {
     const response = await api.get(`/download/${jobId}/${format}`, {
       responseType: 'blob',
@@ -88,7 +238,7 @@ export const apiService = {
     
     // Extract filename from Content-Disposition header
     const contentDisposition = response.headers['content-disposition']
-    let filename = `transcription.${format}`
+    let filename = `transcription.${format === 'bundle' ? 'zip' : format}`
     
     if (contentDisposition) {
       const filenameMatch = contentDisposition.match(/filename="?([^"]+)"?/)